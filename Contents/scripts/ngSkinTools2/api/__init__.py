@@ -1,40 +1,65 @@
-from . import import_v1
-from .copy_paste_weights import PasteOperation, copy_weights, cut_weights, paste_weights
-from .import_export import FileFormat, export_json, import_json
-from .influenceMapping import InfluenceInfo, InfluenceMapping, InfluenceMappingConfig
-from .layers import (
-    Layer,
-    LayerEffects,
-    Layers,
-    NamedPaintTarget,
-    get_layers_enabled,
-    init_layers,
-)
-from .mirror import Mirror, MirrorOptions
-from .paint import (
-    BrushProjectionMode,
-    BrushShape,
-    PaintMode,
-    PaintModeSettings,
-    PaintTool,
-    TabletMode,
-    WeightsDisplayMode,
-)
-from .suspend_updates import suspend_updates
-from .target_info import (
-    add_influences,
-    get_related_skin_cluster,
-    is_slow_mode_skin_cluster,
-    list_influences,
-)
-from .tools import (
-    assign_from_closest_joint,
-    copy_component_weights,
-    duplicate_layer,
-    fill_transparency,
-    flood_weights,
-    merge_layers,
-    paste_average_component_weights,
-    unify_weights,
-)
-from .transfer import VertexTransferMode, transfer_layers
+"""
+Public API of ngSkinTools2.
+
+Names below are imported from their submodules on first access (Python 3.7+), so that importing `ngSkinTools2.api`
+for, e.g., exporting weights on a render farm does not load every submodule. On older Pythons, everything is imported
+upfront. Submodules can be accessed as attributes as well (`api.paint`, `api.import_v1`).
+"""
+import importlib
+import sys
+
+__exports = {
+    ".copy_paste_weights": ["PasteOperation", "copy_weights", "cut_weights", "paste_weights"],
+    ".export_data": ["ExportOptions"],
+    ".import_export": ["FileFormat", "export_json", "import_json", "import_json_batch"],
+    ".influenceMapping": ["InfluenceInfo", "InfluenceMapping", "InfluenceMappingConfig"],
+    ".layers": ["Layer", "LayerEffects", "Layers", "NamedPaintTarget", "get_layers_enabled", "init_layers"],
+    ".mirror": ["Mirror", "MirrorOptions", "mirror_layers"],
+    ".paint": ["BrushProjectionMode", "BrushShape", "PaintMode", "PaintModeSettings", "PaintTool", "TabletMode", "WeightsDisplayMode"],
+    ".suspend_updates": ["suspend_updates"],
+    ".symmetry_map": ["export_symmetry_map", "import_symmetry_map"],
+    ".target_info": ["add_influences", "get_related_skin_cluster", "is_slow_mode_skin_cluster", "list_influences"],
+    ".tools": [
+        "assign_from_closest_joint",
+        "copy_component_weights",
+        "duplicate_layer",
+        "fill_transparency",
+        "flood_weights",
+        "merge_layers",
+        "paste_average_component_weights",
+        "unify_weights",
+    ],
+    ".transfer": ["VertexTransferMode", "transfer_layers", "transfer_layers_batch"],
+}
+
+__export_modules = dict((name, module) for module, names in __exports.items() for name in names)
+
+__all__ = sorted(__export_modules.keys())
+
+
+def __getattr__(name):
+    module = __export_modules.get(name, None)
+    if module is None:
+        # not an exported name: maybe a submodule that was not imported yet
+        try:
+            return importlib.import_module("." + name, __name__)
+        except ImportError as err:
+            if getattr(err, 'name', None) not in (None, __name__ + "." + name):
+                raise
+            raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
+
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals().keys()) | set(__all__))
+
+
+if sys.version_info < (3, 7):
+    # no module-level __getattr__ support
+    from . import import_v1
+
+    for __name in __all__:
+        __getattr__(__name)
@@ -26,10 +26,10 @@ and emits if state changes.
 
 Whenever possible, keep event tree localized in single place for easier refactoring.
 """
-from maya import cmds
+from maya import cmds, utils
 
 from ngSkinTools2 import api, cleanup, signal
-from ngSkinTools2.api import target_info
+from ngSkinTools2.api import mirror, target_info
 from ngSkinTools2.api.log import getLogger
 from ngSkinTools2.api.python_compatibility import Object
 from ngSkinTools2.signal import Signal
@@ -45,6 +45,8 @@ class ConditionalEmit(Object):
     def emitIfChanged(self):
         if self.check():
             self.signal.emit()
+        elif signal.profiler is not None:
+            signal.profiler.skipped(self.signal.name)
 
     def addHandler(self, handler, **kwargs):
         self.signal.addHandler(handler, **kwargs)
@@ -53,6 +55,74 @@ class ConditionalEmit(Object):
         self.signal.removeHandler(handler)
 
 
+class CoalescedEmit(Object):
+    """
+    Forwards any number of requests, received until Maya becomes idle, as a single deferred emit of the signal.
+    """
+
+    def __init__(self, signal):
+        self.signal = signal
+        self.pending = False
+
+    def request(self, *_):
+        if self.pending:
+            if signal.profiler is not None:
+                signal.profiler.skipped(self.signal.name)
+            return
+        self.pending = True
+        utils.executeDeferred(self.__emit)
+
+    def __emit(self):
+        self.pending = False
+        self.signal.emit()
+
+
+def layer_fingerprint(layer):
+    """
+    :type layer: ngSkinTools2.api.Layer
+    """
+    return layer.name, layer.parent_id, layer.enabled, layer.index
+
+
+class LayersSnapshot(Object):
+    """
+    detached copy of the layer list state: `Layer` objects are edited in place, so keeping them around to compare
+    against later would always compare a layer with itself.
+    """
+
+    def __init__(self, layers=()):
+        """
+        :type layers: list[ngSkinTools2.api.Layer]
+        """
+        self.ids = [l.id for l in layers]  #: layer IDs in list order
+        self.fingerprints = dict((l.id, layer_fingerprint(l)) for l in layers)  #: layer ID -> layer fingerprint
+        self.meshes = set(l.mesh for l in layers)
+
+
+class LayersDiff(Object):
+    """
+    difference between two layer lists, as layer IDs; layer list is also considered changed when layers are reordered
+    or the list belongs to a different skin cluster.
+    """
+
+    def __init__(self, previous, current):
+        """
+        :type previous: LayersSnapshot
+        :type current: LayersSnapshot
+        """
+        self.added = [i for i in current.ids if i not in previous.fingerprints]
+        self.removed = [i for i in previous.ids if i not in current.fingerprints]
+        self.changed = [i for i in current.ids if i in previous.fingerprints and previous.fingerprints[i] != current.fingerprints[i]]
+        self.reordered = [i for i in previous.ids if i in current.fingerprints] != [i for i in current.ids if i in previous.fingerprints]
+        self.target_changed = previous.meshes != current.meshes and bool(previous.ids) and bool(current.ids)
+
+    def is_empty(self):
+        return not (self.added or self.removed or self.changed or self.reordered or self.target_changed)
+
+    def __repr__(self):
+        return "LayersDiff(added={0.added!r}, removed={0.removed!r}, changed={0.changed!r}, reordered={0.reordered!r})".format(self)
+
+
 def script_job(*args, **kwargs):
     """
     a proxy on top of cmds.scriptJob for scriptJob creation;
@@ -91,8 +161,13 @@ class Events(Object):
             return result
 
         self.mayaDeleteAll = script_job_signal('deleteAll')
+        self.mayaDeleteAll.addHandler(target_info.resolution_cache.clear)
+        cleanup.registerCleanupHandler(target_info.resolution_cache.clear)
 
-        self.nodeSelectionChanged = script_job_signal('SelectionChanged')
+        # selection changes come in bursts (marquee selection, scripts); handlers evaluate the selection only once
+        # per idle cycle, and always see the latest selection
+        self.nodeSelectionChanged = Signal("SelectionChanged_scriptJob")
+        script_job(e=['SelectionChanged', CoalescedEmit(self.nodeSelectionChanged).request])
 
         self.undoExecuted = script_job_signal('Undo')
         self.redoExecuted = script_job_signal('Redo')
@@ -108,21 +183,16 @@ class Events(Object):
             verify that currently selected mesh is changed, and this means a change in LayersManager.
             """
             selection = cmds.ls(selection=True, objectsOnly=True) or []
-            selected_skin_cluster = None if not selection else target_info.get_related_skin_cluster(selection[-1])
-
-            if selected_skin_cluster is not None:
-                layers_available = api.get_layers_enabled(selected_skin_cluster)
-            else:
-                layers_available = False
+            resolved = target_info.ResolvedTarget() if not selection else target_info.resolution_cache.resolve(selection[-1])
+            selected_skin_cluster = resolved.skin_cluster
+            layers_available = resolved.layers_enabled
 
             if state.selectedSkinCluster == selected_skin_cluster and state.layersAvailable == layers_available:
                 return False
 
             state.selection = selection
             state.set_skin_cluster(selected_skin_cluster)
-            state.skin_cluster_dq_channel_used = (
-                False if selected_skin_cluster is None else cmds.getAttr(selected_skin_cluster + ".skinningMethod") == 2
-            )
+            state.skin_cluster_dq_channel_used = resolved.dq_mode
             state.layersAvailable = layers_available
             state.all_layers = []  # reset when target has actually changed
             log.info("target changed, layers available: %s", state.layersAvailable)
@@ -135,9 +205,22 @@ class Events(Object):
             source.addHandler(event.emitIfChanged)
 
         def check_layers_list_changed():
+            """
+            emits only when layer list differs from previous one
+            """
             state.all_layers = [] if not state.layersAvailable else api.Layers(state.selectedSkinCluster).list()
+
+            snapshot = LayersSnapshot(state.all_layers)
+            diff = LayersDiff(last_emitted_layers[0], snapshot)
+            if diff.is_empty():
+                return False
+
+            log.info("layer list changed: %r", diff)
+            last_emitted_layers[0] = snapshot
             return True
 
+        last_emitted_layers = [LayersSnapshot()]
+
         self.layerListChanged = ConditionalEmit("layerListChanged", check_layers_list_changed)
         signal.on(self.targetChanged, self.undoRedoExecuted)(self.layerListChanged.emitIfChanged)
 
@@ -185,6 +268,7 @@ class Events(Object):
         self.currentLayerChanged.addHandler(event.emitIfChanged)
 
         self.influencesListUpdated = Signal("influencesListUpdated")
+        self.influencesListUpdated.addHandler(lambda: mirror.mapper_cache.invalidate())
 
         # now get initial state
         self.targetChanged.emitIfChanged()
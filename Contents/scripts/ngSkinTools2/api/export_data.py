@@ -0,0 +1,553 @@
+"""
+Python-side processing of layer files written by plugin's "exportJsonFile" tool and read by "importJsonFile".
+
+Plugin only reads and writes plain json; extended file formats are converted from/to plain json here.
+
+Relevant parts of plain json structure:
+
+    {
+        "influences": [...],
+        "mesh": {"vertPositions": [...], "triangles": [...]},
+        "layers": [
+            {"name": ..., "parentId": ..., "mask": [...], "influences": ..., "effects": {...}, ...},
+            ...
+        ]
+    }
+
+Per-vertex weight arrays of a layer ("channels") are found under layer's "mask", "dq" and "influences" keys.
+"""
+import base64
+import gzip
+import hashlib
+import json
+import os
+import struct
+from collections import OrderedDict
+
+from ngSkinTools2.api.log import getLogger
+from ngSkinTools2.api.python_compatibility import Object
+
+log = getLogger("export data")
+
+CHANNEL_ROOTS = ("mask", "dq", "influences")
+
+
+def load(file):
+    with open(file) as f:
+        return json.load(f)
+
+
+def save(data, file):
+    with open(file, 'w') as f:
+        json.dump(data, f)
+
+
+def is_channel(value):
+    """
+    returns true if value is a per-vertex weights list (or an encoded form of it)
+    """
+    if is_quantized(value) or is_channel_ref(value):
+        return True
+
+    if not isinstance(value, list) or not value:
+        return False
+
+    for i in value:
+        if isinstance(i, bool) or not isinstance(i, (int, float)):
+            return False
+    return True
+
+
+def iter_layer_channels(layer):
+    """
+    iterates over weight channels in the layer, yielding (path, weights) pairs, where path is a tuple of keys/indexes
+    leading to weights list from layer root.
+
+    :type layer: dict
+    """
+
+    def walk(value, path):
+        if is_channel(value):
+            yield path, value
+            return
+
+        if isinstance(value, dict):
+            for k in sorted(value.keys()):
+                for result in walk(value[k], path + (k,)):
+                    yield result
+        elif isinstance(value, list):
+            for index, i in enumerate(value):
+                for result in walk(i, path + (index,)):
+                    yield result
+
+    for root in CHANNEL_ROOTS:
+        if root in layer:
+            for result in walk(layer[root], (root,)):
+                yield result
+
+
+def set_layer_channel(layer, path, value):
+    container = layer
+    for i in path[:-1]:
+        container = container[i]
+    container[path[-1]] = value
+
+
+def content_hash(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True).encode()).hexdigest()
+
+
+def influence_entry_index(entry):
+    """
+    returns influence logical index of an entry in layer's "influences" container, or None if entry is not
+    recognized as per-influence data
+    """
+    if isinstance(entry, dict):
+        return entry.get('index', None)
+    if isinstance(entry, list) and len(entry) == 2 and not isinstance(entry[0], (list, dict)):
+        return entry[0]
+    return None
+
+
+def filter_layer_influences(layer, keep):
+    """
+    removes per-influence weights from layer, except for influences in `keep`; entries that are not recognized as
+    per-influence data are left as is.
+
+    :type layer: dict
+    :type keep: set[int]
+    """
+
+    def is_kept(index):
+        try:
+            return int(index) in keep
+        except (TypeError, ValueError):
+            return True
+
+    influences = layer.get('influences', None)
+    if isinstance(influences, dict):
+        layer['influences'] = {k: v for k, v in influences.items() if is_kept(k)}
+    elif isinstance(influences, list):
+        layer['influences'] = [i for i in influences if is_kept(influence_entry_index(i))]
+
+
+class LayerFilter(Object):
+    """
+    Reduces exported data to selected layers and influences only.
+    """
+
+    def __init__(self, layers=None, influences=None):
+        """
+        :param list layers: layer names or IDs to keep; None keeps all layers
+        :param list influences: influence paths, names or logical indexes to keep; None keeps all influences
+        """
+        self.layers = layers
+        self.influences = influences
+
+    def is_empty(self):
+        return self.layers is None and self.influences is None
+
+    def matches_layer(self, layer):
+        return layer.get('name', None) in self.layers or layer.get('id', None) in self.layers
+
+    def matches_influence(self, influence):
+        path = influence.get('path', None) or ""
+        names = {path, influence.get('name', None), path.split("|")[-1], influence.get('index', None)}
+        for i in self.influences:
+            if i in names:
+                return True
+        return False
+
+    def apply(self, data):
+        """
+        filters plain or incremental export data in-place
+        """
+        if self.layers is not None:
+            layers = data.get('layers', [])
+            kept = [l for l in layers if self.matches_layer(l)]
+            kept_ids = {l.get('id', None) for l in kept}
+            parents = {l.get('id', None): l.get('parentId', None) for l in layers}
+
+            # re-parent each kept layer under nearest kept ancestor
+            for l in kept:
+                parent = l.get('parentId', None)
+                while parent is not None and parent not in kept_ids:
+                    parent = parents.get(parent, None)
+                l['parentId'] = parent
+
+            data['layers'] = kept
+            log.info("layers filter: keeping %d out of %d layers", len(kept), len(layers))
+
+        if self.influences is not None:
+            kept = [i for i in data.get('influences', []) if self.matches_influence(i)]
+            data['influences'] = kept
+            keep_indexes = {int(i['index']) for i in kept}
+            for l in data.get('layers', []):
+                filter_layer_influences(l, keep_indexes)
+            log.info("influences filter: keeping influences %r", sorted(keep_indexes))
+
+        return data
+
+
+def channel_influence_index(layer, path):
+    """
+    for channel path, as returned by `iter_layer_channels`, returns logical index of the influence; returns None if
+    channel is not influence weights (e.g. mask).
+    """
+    if len(path) < 2 or path[0] != 'influences':
+        return None
+
+    influences = layer['influences']
+    if isinstance(influences, dict):
+        return int(path[1])
+    return influence_entry_index(influences[path[1]])
+
+
+# -----------------------------------
+# quantized channels: weights stored as fixed point integers, {"$quantized": bits, "data": base64 of little endian ints}
+
+QUANTIZED = "$quantized"
+ENCODING_MARKER = '{"encoding": '
+struct_formats = {8: "B", 16: "H"}
+
+
+def is_quantized(value):
+    return isinstance(value, dict) and QUANTIZED in value
+
+
+def quantize(weights, bits):
+    max_value = (1 << bits) - 1
+    values = [min(max_value, max(0, int(round(w * max_value)))) for w in weights]
+    data = struct.pack("<%d%s" % (len(values), struct_formats[bits]), *values)
+    return {QUANTIZED: bits, "data": base64.b64encode(data).decode()}
+
+
+def dequantize(value):
+    bits = value[QUANTIZED]
+    data = base64.b64decode(value['data'])
+    count = len(data) * 8 // bits
+    max_value = float((1 << bits) - 1)
+    return [i / max_value for i in struct.unpack("<%d%s" % (count, struct_formats[bits]), data)]
+
+
+# -----------------------------------
+# deduplicated channels: channels that appear more than once in the file are stored once in top-level "channels"
+# table, keyed by content hash, and replaced with {"$channel": hash} references
+
+CHANNEL_REF = "$channel"
+
+
+def is_channel_ref(value):
+    return isinstance(value, dict) and CHANNEL_REF in value
+
+
+def deduplicate_channels(data):
+    """
+    moves channels that are used more than once into shared "channels" table
+
+    :return: number of channel copies replaced with references
+    """
+    occurrences = {}
+    for layer in data.get('layers', []):
+        for path, weights in iter_layer_channels(layer):
+            occurrences.setdefault(content_hash(weights), []).append((layer, path, weights))
+
+    shared = {}
+    replaced = 0
+    for channel_hash, uses in occurrences.items():
+        if len(uses) < 2:
+            continue
+        shared[channel_hash] = uses[0][2]
+        for layer, path, _ in uses:
+            set_layer_channel(layer, path, {CHANNEL_REF: channel_hash})
+        replaced += len(uses) - 1
+
+    if shared:
+        data['channels'] = shared
+    return replaced
+
+
+def with_encoding(data, encoding):
+    """
+    returns data with encoding list as the first key, so that it can be detected without parsing the whole file
+    """
+    return OrderedDict([('encoding', encoding)] + [(k, v) for k, v in data.items() if k != 'encoding'])
+
+
+def is_encoded_file(file):
+    """
+    cheap check if plain json file contains encoded channels and needs decoding before passing it to plugin
+    """
+    with open(file) as f:
+        return f.read(len(ENCODING_MARKER)) == ENCODING_MARKER
+
+
+def decode_channels(data):
+    """
+    replaces deduplicated and quantized channels in-place with float lists
+    """
+    shared = data.pop('channels', {})
+    for layer in data.get('layers', []):
+        for path, weights in list(iter_layer_channels(layer)):
+            if is_channel_ref(weights):
+                weights = shared[weights[CHANNEL_REF]]
+            if is_quantized(weights):
+                weights = dequantize(weights)
+            set_layer_channel(layer, path, weights)
+    data.pop('encoding', None)
+    return data
+
+
+def read_plain(source_file, plain_file, data_filter=None):
+    """
+    converts extended plain json (filtered, deduplicated, quantized) into a plain json that plugin can read
+    """
+    data = load(source_file)
+    if data_filter is not None:
+        data_filter.apply(data)
+    save(decode_channels(data), plain_file)
+
+
+class ExportOptions(Object):
+    """
+    Lossy export options, reducing file size.
+    """
+
+    def __init__(self, prune_threshold=0.0, quantize_bits=None, drop_empty_influences=False, deduplicate_channels=False):
+        """
+        :param float prune_threshold: influence weights below this value are set to zero, and remaining weights of the vertex
+            are scaled up to preserve layer transparency (same semantics as `Layers.prune_weights_filter_threshold`)
+        :param int quantize_bits: if set, weights are stored as 8 or 16 bit fixed point values
+        :param bool drop_empty_influences: influence channels that are all-zero (after pruning/quantization) are not written
+        :param bool deduplicate_channels: identical channels (e.g. in duplicated layers) are written only once; lossless,
+            but files can only be read by ngSkinTools2 versions that support the "channels" table
+        """
+        if quantize_bits not in (None, 8, 16):
+            raise Exception("quantization is only supported for 8 or 16 bits")
+        self.prune_threshold = prune_threshold
+        self.quantize_bits = quantize_bits
+        self.drop_empty_influences = drop_empty_influences
+        self.deduplicate_channels = deduplicate_channels
+
+    def is_lossless(self):
+        return not self.prune_threshold and self.quantize_bits is None and not self.drop_empty_influences
+
+    def modifies_data(self):
+        return self.deduplicate_channels or not self.is_lossless()
+
+
+class ExportReport(Object):
+    def __init__(self):
+        self.layers = []  #: list of (layer id, layer name, max reconstruction error)
+
+    def max_error(self):
+        return max([i[2] for i in self.layers] or [0.0])
+
+    def __repr__(self):
+        return "\n".join("layer {0} '{1}': max error {2:.6f}".format(*i) for i in self.layers)
+
+
+def prune_influence_weights(channels, threshold):
+    """
+    per vertex, sets weights below threshold to zero and scales remaining weights to keep the vertex total
+
+    :type channels: list[list[float]]
+    """
+    for vertex, weights in enumerate(zip(*channels)):
+        total = sum(weights)
+        kept = sum(w for w in weights if w >= threshold)
+        if kept <= 0 or kept == total:
+            continue
+
+        scale = total / kept
+        for channel, w in zip(channels, weights):
+            channel[vertex] = w * scale if w >= threshold else 0.0
+
+
+def apply_export_options(plain_file, options, deduplicate=True):
+    """
+    applies export options on plain export file in-place
+
+    :type options: ExportOptions
+    :param bool deduplicate: set to False to skip channel deduplication even if requested in options, e.g. when
+        output format deduplicates channels by itself
+    :rtype: ExportReport
+    """
+    data = load(plain_file)
+    report = ExportReport()
+
+    for layer in data.get('layers', []):
+        channels = list(iter_layer_channels(layer))
+        original = [list(weights) for _, weights in channels]
+
+        influence_channels = [weights for path, weights in channels if channel_influence_index(layer, path) is not None]
+        if options.prune_threshold and influence_channels:
+            prune_influence_weights(influence_channels, options.prune_threshold)
+
+        max_error = 0.0
+        empty_influences = set()
+        for (path, weights), original_weights in zip(channels, original):
+            if options.quantize_bits is not None:
+                encoded = quantize(weights, options.quantize_bits)
+                weights = dequantize(encoded)
+                set_layer_channel(layer, path, encoded)
+
+            influence = channel_influence_index(layer, path)
+            if influence is not None and not any(weights):
+                empty_influences.add(int(influence))
+
+            max_error = max([max_error] + [abs(a - b) for a, b in zip(weights, original_weights)])
+
+        if options.drop_empty_influences and empty_influences:
+            used = {int(channel_influence_index(layer, path)) for path, _ in channels if channel_influence_index(layer, path) is not None}
+            filter_layer_influences(layer, used - empty_influences)
+
+        report.layers.append((layer.get('id', None), layer.get('name', None), max_error))
+
+    encoding = []
+    if options.quantize_bits is not None:
+        encoding.append('quantized')
+    if deduplicate and options.deduplicate_channels and deduplicate_channels(data) > 0:
+        encoding.append('deduplicated')
+    if encoding:
+        data = with_encoding(data, encoding)
+
+    with open(plain_file, 'w') as f:
+        f.write(json.dumps(data, sort_keys=False))
+
+    log.info("export options applied: %r", report)
+    return report
+
+
+# -----------------------------------
+# incremental format: a manifest file, where weight channels are replaced with {"$block": hash} references
+# into content-addressed block stores (directories of gzipped json arrays)
+
+BLOCK_REF = "$block"
+MANIFEST_FORMAT = "ngSkinTools2 incremental"
+
+
+def block_store_dir(manifest_file):
+    return manifest_file + ".blocks"
+
+
+def is_block_ref(value):
+    return isinstance(value, dict) and BLOCK_REF in value
+
+
+class BlockStores(Object):
+    """
+    ordered list of block store directories to resolve block references from
+    """
+
+    def __init__(self, dirs):
+        self.dirs = dirs
+
+    def block_file(self, directory, block_hash):
+        return os.path.join(directory, block_hash + ".json.gz")
+
+    def find(self, block_hash):
+        for d in self.dirs:
+            result = self.block_file(d, block_hash)
+            if os.path.isfile(result):
+                return result
+        return None
+
+    def read(self, block_hash):
+        file = self.find(block_hash)
+        if file is None:
+            raise Exception("block {0} not found in any of block stores: {1}".format(block_hash, self.dirs))
+        with gzip.open(file, 'rb') as f:
+            return json.loads(f.read().decode())
+
+    def write(self, directory, block_hash, value):
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        with gzip.open(self.block_file(directory, block_hash), 'wb') as f:
+            f.write(json.dumps(value).encode())
+
+
+def load_manifest_stores(manifest_file):
+    """
+    returns absolute block store dirs, referenced by existing manifest
+    """
+    manifest = load(manifest_file)
+    base_dir = os.path.dirname(os.path.abspath(manifest_file))
+    return [os.path.normpath(os.path.join(base_dir, i)) for i in manifest['blockStores']]
+
+
+def write_incremental(plain_file, manifest_file, previous_manifest=None, store_dir=None):
+    """
+    converts plain export into a manifest + blocks. Only channels that are not present in block stores of previous
+    export (or this file's own block store) are written.
+
+    :param str store_dir: block store to write new blocks to; defaults to manifest's own block store
+
+    :return: (written blocks count, reused blocks count)
+    """
+    data = load(plain_file)
+
+    own_store = os.path.abspath(block_store_dir(manifest_file) if store_dir is None else store_dir)
+    dirs = [own_store]
+    if previous_manifest is not None:
+        dirs.extend(i for i in load_manifest_stores(previous_manifest) if i not in dirs)
+    stores = BlockStores(dirs)
+
+    written = 0
+    reused = 0
+    for layer in data.get('layers', []):
+        channel_hashes = []
+        for path, weights in list(iter_layer_channels(layer)):
+            block_hash = content_hash(weights)
+            channel_hashes.append(block_hash)
+            if stores.find(block_hash) is None:
+                stores.write(own_store, block_hash, weights)
+                written += 1
+            else:
+                reused += 1
+            set_layer_channel(layer, path, {BLOCK_REF: block_hash})
+
+        layer_data_without_channels = {k: v for k, v in layer.items() if k not in CHANNEL_ROOTS}
+        layer['contentHash'] = content_hash([layer_data_without_channels, channel_hashes])
+
+    manifest_dir = os.path.dirname(os.path.abspath(manifest_file))
+    data['format'] = MANIFEST_FORMAT
+    data['blockStores'] = [os.path.relpath(d, manifest_dir) for d in dirs]
+    save(data, manifest_file)
+
+    log.info("incremental export to %s: %d blocks written, %d reused", manifest_file, written, reused)
+    return written, reused
+
+
+def read_incremental(manifest_file, plain_file, data_filter=None):
+    """
+    reconstructs full plain export from the manifest and it's block stores. If data filter is provided, it's applied
+    before blocks are resolved, so blocks of filtered-out layers and influences are never read.
+
+    :type data_filter: LayerFilter
+    """
+    data = load(manifest_file)
+    if data_filter is not None:
+        data_filter.apply(data)
+    stores = BlockStores(load_manifest_stores(manifest_file))
+
+    def resolve(value):
+        if is_quantized(value):
+            return value
+        if is_block_ref(value):
+            return stores.read(value[BLOCK_REF])
+        if isinstance(value, dict):
+            return {k: resolve(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [resolve(i) for i in value]
+        return value
+
+    for layer in data.get('layers', []):
+        layer.pop('contentHash', None)
+        for root in CHANNEL_ROOTS:
+            if root in layer:
+                layer[root] = resolve(layer[root])
+
+    data.pop('format', None)
+    data.pop('blockStores', None)
+    save(decode_channels(data), plain_file)
@@ -1,8 +1,10 @@
+import os
 from os import unlink
 
 from ngSkinTools2.api import plugin
 
-from . import transfer
+from . import export_data, transfer, vertex_correspondence
+from .python_compatibility import PY3
 from .influenceMapping import InfluenceMappingConfig
 
 
@@ -10,6 +12,7 @@ from .influenceMapping import InfluenceMappingConfig
 class FileFormat:
     JSON = "json"
     CompressedJSON = "compressed json"
+    IncrementalJSON = "incremental json"  #: manifest file plus content-addressed weight blocks; see `export_json`
 
 
 # noinspection PyShadowingBuiltins
@@ -19,6 +22,8 @@ def import_json(
     vertex_transfer_mode=transfer.VertexTransferMode.closestPoint,
     influences_mapping_config=InfluenceMappingConfig.transfer_defaults(),
     format=FileFormat.JSON,
+    layers=None,
+    influences=None,
 ):
     """
     Transfer layers from file into provided target mesh. Existing layers, if any, will be preserved
@@ -28,32 +33,98 @@ def import_json(
     :param vertex_transfer_mode: vertex mapping mode when matching imported file's vertices to the target mesh
     :param InfluenceMappingConfig influences_mapping_config:
     :param str format: expected file format, one of `FileFormat` values
+    :param list layers: if provided, only layers with these names or IDs are imported
+    :param list influences: if provided, only weights of these influences (paths, names or logical indexes in the file) are imported
     """
 
     importer = transfer.LayersTransfer()
     importer.vertex_transfer_mode = vertex_transfer_mode
     importer.influences_mapping.config = influences_mapping_config
-    importer.load_source_from_file(file, format=format)
+    importer.load_source_from_file(file, format=format, layers=layers, influences=influences)
     importer.target = target
     importer.execute()
 
 
 # noinspection PyShadowingBuiltins
-def export_json(target, file, format=FileFormat.JSON):
+def import_json_batch(
+    targets,
+    file,
+    vertex_transfer_mode=transfer.VertexTransferMode.closestPoint,
+    influences_mapping_config=InfluenceMappingConfig.transfer_defaults(),
+    format=FileFormat.JSON,
+    layers=None,
+    influences=None,
+):
+    """
+    Transfer layers from file into each of provided target meshes. File is read and parsed only once, and influence
+    mapping is reused between targets that share the same influences; whole import is a single undo step.
+
+    :param list[str] targets: destination mesh or skin cluster node names
+    :param str file: file path to load json from
+    :param vertex_transfer_mode: vertex mapping mode when matching imported file's vertices to the target meshes
+    :param InfluenceMappingConfig influences_mapping_config:
+    :param str format: expected file format, one of `FileFormat` values
+    :param list layers: if provided, only layers with these names or IDs are imported
+    :param list influences: if provided, only weights of these influences are imported
+    :return: list of targets that layers were imported into
+    """
+
+    importer = transfer.BatchLayersTransfer()
+    importer.vertex_transfer_mode = vertex_transfer_mode
+    importer.influences_mapping_config = influences_mapping_config
+    importer.load_source_from_file(file, format=format, layers=layers, influences=influences)
+    importer.targets = list(targets)
+    return importer.execute()
+
+
+# noinspection PyShadowingBuiltins
+def export_json(target, file, format=FileFormat.JSON, previous_export=None, options=None):
     """
     Save skinning layers to file in json format, to be later used in `import_json`
 
+    With `FileFormat.IncrementalJSON`, `file` becomes a manifest, and each weights channel is stored as a separate
+    block in `<file>.blocks` directory, named by content hash. Blocks that already exist in block stores of
+    `previous_export` manifest are not written again, so only changed channels cost disk I/O.
+
     :param str target: source mesh or skin cluster node name
     :param str file: file path to save json to
     :param str format: exported file format, one of `FileFormat` values
+    :param str previous_export: for `FileFormat.IncrementalJSON`, manifest of previous export to reuse unchanged blocks from
+    :param export_data.ExportOptions options: size reduction options (channel deduplication, pruning, quantization);
+        reconstruction error per layer is returned as a report. By default, plugin output is written as is.
+    :rtype: export_data.ExportReport
     """
+    if options is None:
+        options = export_data.ExportOptions()
 
-    with FileFormatWrapper(file, format=format, read_mode=False) as f:
-        plugin.ngst2tools(
-            tool="exportJsonFile",
-            target=target,
-            file=f.plain_file,
-        )
+    with FileFormatWrapper(file, format=format, read_mode=False, previous_file=previous_export, options=options) as f:
+        export_plain_json(target, f.plain_file)
+    vertex_correspondence.save_file_fingerprint(file, vertex_correspondence.mesh_fingerprint(target))
+    return f.report
+
+
+def export_plain_json(target, file):
+    """
+    writes plugin's plain json export, without any post-processing
+    """
+    plugin.ngst2tools(
+        tool="exportJsonFile",
+        target=target,
+        file=file,
+    )
+
+
+def replace_file(source, dest):
+    """
+    moves source file to dest, replacing dest if it exists.
+    """
+    if PY3:
+        os.replace(source, dest)
+        return
+
+    if os.path.exists(dest):
+        unlink(dest)
+    os.rename(source, dest)
 
 
 def compress_gzip(source, dest):
@@ -73,38 +144,99 @@ def decompress_gzip(source, dest):
 
 
 class FileFormatWrapper:
-    def __init__(self, target_file, format, read_mode=False):
+    def __init__(self, target_file, format, read_mode=False, previous_file=None, data_filter=None, options=None):
+        """
+        :type data_filter: export_data.LayerFilter
+        :type options: export_data.ExportOptions
+        """
         self.target_file = target_file
         self.format = format
+        self.read_mode = read_mode
+        self.previous_file = previous_file
+        self.data_filter = None if data_filter is None or data_filter.is_empty() else data_filter
+        self.options = None if options is None or not options.modifies_data() else options
+        self.report = None
+        self.encoded = (
+            read_mode and format == FileFormat.JSON and os.path.isfile(target_file) and export_data.is_encoded_file(target_file)
+        )
         self.plain_file = target_file
         if self.using_temp_file():
             self.plain_file = target_file + "_temp"
-        self.read_mode = read_mode
+        self.output_file = target_file
+        if not read_mode:
+            self.output_file = self.plain_file if format == FileFormat.JSON else target_file + "_output"
 
     def using_temp_file(self):
-        return self.format != FileFormat.JSON
+        if not self.read_mode:
+            # target file is only replaced in `commit()`, so interrupted export does not leave a partial file behind
+            return True
+        if self.format != FileFormat.JSON:
+            return True
+        return self.data_filter is not None or self.encoded
 
     def __compress__(self):
+        if self.options is not None:
+            # incremental format stores each unique channel once in block stores already
+            deduplicate = self.format != FileFormat.IncrementalJSON
+            self.report = export_data.apply_export_options(self.plain_file, self.options, deduplicate=deduplicate)
         if self.format == FileFormat.CompressedJSON:
-            compress_gzip(self.plain_file, self.target_file)
+            compress_gzip(self.plain_file, self.output_file)
+        if self.format == FileFormat.IncrementalJSON:
+            # blocks go straight to target's block store: they are content-addressed, so blocks of an export that is
+            # never committed are just unreferenced
+            export_data.write_incremental(
+                self.plain_file,
+                self.output_file,
+                previous_manifest=self.previous_file,
+                store_dir=export_data.block_store_dir(self.target_file),
+            )
 
     def __decompress__(self):
+        if self.format == FileFormat.JSON:
+            export_data.read_plain(self.target_file, self.plain_file, self.data_filter)
         if self.format == FileFormat.CompressedJSON:
             decompress_gzip(self.target_file, self.plain_file)
+            if self.data_filter is not None or export_data.is_encoded_file(self.plain_file):
+                export_data.read_plain(self.plain_file, self.plain_file, self.data_filter)
+        if self.format == FileFormat.IncrementalJSON:
+            export_data.read_incremental(self.target_file, self.plain_file, data_filter=self.data_filter)
+
+    def prepare(self):
+        """
+        read mode: converts target file into plain json file that plugin can read. Does not call into Maya, so can run
+        on a worker thread.
+        """
+        if self.read_mode and self.using_temp_file():
+            self.__decompress__()
+
+    def finish(self):
+        """
+        write mode: converts plain json file, written by plugin, into output file; target file is not touched until
+        `commit()`. Does not call into Maya, so can run on a worker thread.
+        """
+        if not self.read_mode:
+            self.__compress__()
+
+    def commit(self):
+        """
+        write mode: replaces target file with the output of `finish()`.
+        """
+        if not self.read_mode:
+            replace_file(self.output_file, self.target_file)
+
+    def cleanup(self):
+        for temp_file in (self.plain_file, self.output_file):
+            if temp_file != self.target_file and os.path.exists(temp_file):
+                unlink(temp_file)
 
     def __enter__(self):
-        if not self.using_temp_file():
-            return self
-        if self.read_mode:
-            self.__decompress__()
+        self.prepare()
         return self
 
     def __exit__(self, _, value, traceback):
-        if not self.using_temp_file():
-            return self
-
         try:
-            if not self.read_mode:
-                self.__compress__()
+            if value is None:
+                self.finish()
+                self.commit()
         finally:
-            unlink(self.plain_file)
+            self.cleanup()
@@ -7,10 +7,141 @@ from ngSkinTools2.api.cmd_wrappers import get_source_node
 from ngSkinTools2.api.layers import Layers
 from ngSkinTools2.api.log import getLogger
 from ngSkinTools2.api.python_compatibility import Object
+from ngSkinTools2.api.suspend_updates import suspend_updates
+from ngSkinTools2.decorators import Undo
 
 log = getLogger("mirror")
 
 
+class InfluencesMapperCache(Object):
+    """
+    Per skin cluster cache of the data needed to build an influences mapper: influences list and mapper configuration.
+
+    Entry for a skin cluster is dropped when influences are connected to or disconnected from skin cluster, or when
+    `influenceMappingOptions` of the data node changes (setAttr, undo/redo, file edits). Influence pivots are part of
+    the cached data, so on each `get`, world matrices of DAG influences are compared to the ones they had when entry
+    was cached, and entry is refreshed if any of influences moved.
+
+    Whole cache is dropped with `invalidate()` (hooked to `influencesListUpdated` event).
+    """
+
+    def __init__(self):
+        self.entries = {}  #: skin cluster -> (influences, config json)
+        self.matrices = {}  #: skin cluster -> list of (influence DAG path, world matrix) at the time entry was cached
+        self.callbacks = {}  #: skin cluster -> list of callback IDs that invalidate the entry
+        self.stale_callbacks = []  #: callbacks of invalidated entries; removed outside of callback execution
+        self.cleanup_registered = False
+
+    def get(self, skin_cluster, data_node):
+        self.__remove_stale_callbacks()
+
+        result = self.entries.get(skin_cluster, None)
+        if result is not None and not self.__influences_moved(skin_cluster):
+            return result
+
+        influences = Layers(skin_cluster).list_influences()
+        config = cmds.getAttr(data_node + ".influenceMappingOptions")
+        result = self.entries[skin_cluster] = (influences, config)
+        self.matrices[skin_cluster] = self.__world_matrices(influences)
+        self.watch(skin_cluster, data_node)
+        return result
+
+    @staticmethod
+    def __world_matrices(influences):
+        from maya.api import OpenMaya as om
+
+        result = []
+        for influence in influences:
+            if influence.path is None:
+                continue
+            selection = om.MSelectionList()
+            try:
+                selection.add(influence.path)
+                dag_path = selection.getDagPath(0)
+                result.append((dag_path, dag_path.inclusiveMatrix()))
+            except RuntimeError:
+                log.warning("could not read world matrix of influence %s", influence.path)
+        return result
+
+    def __influences_moved(self, skin_cluster):
+        for dag_path, matrix in self.matrices.get(skin_cluster, []):
+            try:
+                if not dag_path.inclusiveMatrix().isEquivalent(matrix):
+                    return True
+            except RuntimeError:
+                # influence was deleted
+                return True
+        return False
+
+    def watch(self, skin_cluster, data_node):
+        """
+        registers callbacks that drop the cache entry for given skin cluster when influences list or mapping
+        options change.
+        """
+        from maya import OpenMaya as om
+
+        from ngSkinTools2 import cleanup
+
+        if skin_cluster in self.callbacks:
+            return
+
+        if not self.cleanup_registered:
+            # registered on first use rather than at import time, so that importing cleanup module first does not
+            # cause a circular import
+            self.cleanup_registered = True
+            cleanup.registerCleanupHandler(self.__cleanup)
+
+        def depend_node(name):
+            selection = om.MSelectionList()
+            selection.add(name)
+            node = om.MObject()
+            selection.getDependNode(0, node)
+            return node
+
+        def influence_connections_changed(msg, plug, _other_plug, _client_data):
+            if not msg & (om.MNodeMessage.kConnectionMade | om.MNodeMessage.kConnectionBroken):
+                return
+            if om.MFnAttribute(plug.attribute()).name() == "matrix":
+                self.invalidate(skin_cluster)
+
+        def mapping_options_changed(msg, plug, _other_plug, _client_data):
+            if not msg & om.MNodeMessage.kAttributeSet:
+                return
+            if om.MFnAttribute(plug.attribute()).name() == "influenceMappingOptions":
+                self.invalidate(skin_cluster)
+
+        self.callbacks[skin_cluster] = [
+            om.MNodeMessage.addAttributeChangedCallback(depend_node(skin_cluster), influence_connections_changed),
+            om.MNodeMessage.addAttributeChangedCallback(depend_node(data_node), mapping_options_changed),
+        ]
+
+    def __cleanup(self):
+        self.cleanup_registered = False
+        self.invalidate()
+        self.__remove_stale_callbacks()
+
+    def __remove_stale_callbacks(self):
+        from maya import OpenMaya as om
+
+        while self.stale_callbacks:
+            om.MMessage.removeCallback(self.stale_callbacks.pop())
+
+    def invalidate(self, skin_cluster=None):
+        """
+        drops cache entries; might be called from entry's own callbacks, so callbacks are only scheduled for removal.
+
+        :param skin_cluster: drop single cache entry; when not specified, drops all entries
+        """
+        skin_clusters = set(self.entries) | set(self.callbacks) if skin_cluster is None else [skin_cluster]
+        for i in skin_clusters:
+            self.entries.pop(i, None)
+            self.matrices.pop(i, None)
+            self.stale_callbacks.extend(self.callbacks.pop(i, []))
+
+
+mapper_cache = InfluencesMapperCache()
+
+
 class Mirror(Object):
     """
     query and configure mirror options for provided target
@@ -34,18 +165,22 @@ class Mirror(Object):
 
     # noinspection PyMethodMayBeStatic
     def __edit__(self, **kwargs):
-        plugin.ngst2Layers(self.target, configureMirrorMapping=True, **kwargs)
-        self.recalculate_influences_mapping()
+        with Undo(name="configure mirror"):
+            plugin.ngst2Layers(self.target, configureMirrorMapping=True, **kwargs)
+            # of the editable properties, influence mapping only depends on mirror axis; seam width and vertex
+            # transfer mode edits (e.g., dragging a slider) don't need mapping recalculated
+            if 'mirrorAxis' in kwargs and self.__get_data_node__() is not None:
+                self.recalculate_influences_mapping()
 
     def __mapper_config_attr(self):
         return self.__get_data_node__() + ".influenceMappingOptions"
 
     def build_influences_mapper(self, defaults=None):
         mapper = influenceMapping.InfluenceMapping()
-        layers = Layers(self.target)
-        mapper.influences = layers.list_influences()
+        influences, config = mapper_cache.get(self.__get_skin_cluster__(), self.__get_data_node__())
+        mapper.influences = list(influences)
 
-        mapper.config.load_json(cmds.getAttr(self.__mapper_config_attr()))
+        mapper.config.load_json(config)
         mapper.config.mirror_axis = self.axis
 
         return mapper
@@ -56,6 +191,9 @@ class Mirror(Object):
         """
         self.set_mirror_config(mapper.config.as_json())
 
+    def get_mirror_config(self):
+        return cmds.getAttr(self.__mapper_config_attr())
+
     def set_mirror_config(self, config_as_json):
         cmds.setAttr(self.__mapper_config_attr(), config_as_json, type='string')
 
@@ -173,6 +311,48 @@ class MirrorOptions(Object):
         self.direction = MirrorOptions.directionPositiveToNegative
 
 
+def mirror_layers(targets, layers=None, options=None):
+    """
+    Mirror many layers on many targets as a single undo step; updates of each target are suspended until all of its
+    layers are mirrored. Influence mappings of all targets are brought up to date before mirroring starts.
+
+    :param list[str] targets: meshes or skin clusters
+    :param list layers: layer names or IDs to mirror on each target; all layers are mirrored if not specified
+    :param MirrorOptions options: mirror options; defaults are used if not specified
+    :return: list of (target, layer ID, layer name, seconds) for each mirrored layer
+    """
+    import time
+
+    if options is None:
+        options = MirrorOptions()
+
+    jobs = []
+    for target in targets:
+        m = Mirror(target)
+
+        all_layers = Layers(target)
+        selected = [l for l in all_layers.list() if layers is None or l.id in layers or l.name in layers]
+        if selected:
+            jobs.append((m, all_layers, selected))
+
+    result = []
+    with Undo(name="mirror_layers"):
+        for m, all_layers, selected in jobs:
+            current_layer = all_layers.current_layer()
+            with suspend_updates(m.target):
+                for layer in selected:
+                    started = time.time()
+                    layer.set_current()
+                    m.mirror(options)
+                    result.append((m.target, layer.id, layer.name, time.time() - started))
+                    log.info("mirrored %s layer '%s': %.3fs", m.target, layer.name, result[-1][3])
+
+                if current_layer is not None:
+                    current_layer.set_current()
+
+    return result
+
+
 def set_reference_mesh_from_selection():
     selection = cmds.ls(sl=True, long=True)
 
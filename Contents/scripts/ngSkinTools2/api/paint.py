@@ -2,7 +2,6 @@ import copy
 import json
 
 from maya import cmds
-from PySide2 import QtCore
 
 from ngSkinTools2.api import internals, plugin
 from ngSkinTools2.api.log import getLogger
@@ -202,7 +201,11 @@ class PaintSettingsModel(Object):
     limit_to_component_selection = __make_common_property__("limit_to_component_selection")
     fixed_influences_per_vertex = __make_common_property__("fixed_influences_per_vertex")
 
-    def __init__(self):
+    def __init__(self, apply_settings=True):
+        """
+        :param bool apply_settings: when False, settings are only loaded from storage; caller is responsible for
+            calling `apply_settings()` before brush is used.
+        """
         self.projection_settings = None
         self.mode_settings = None
         self.primary_settings = None
@@ -210,7 +213,7 @@ class PaintSettingsModel(Object):
         self.storage_func_load = lambda: ""
         self.apply_settings_func = self.apply_plugin_settings
 
-        self.setup_maya_option_var_persistence()
+        self.setup_maya_option_var_persistence(apply_settings=apply_settings)
 
     def __save_settings(self):
         data = {
@@ -222,7 +225,7 @@ class PaintSettingsModel(Object):
         log.info("saving brush settings: %s", serialized_data)
         self.storage_func_save(serialized_data)
 
-    def load_settings(self):
+    def load_settings(self, apply_settings=True):
         def to_int_keys(d):
             return {int(k): v for k, v in d.items()}
 
@@ -230,24 +233,25 @@ class PaintSettingsModel(Object):
             saved_data = self.storage_func_load()
             log.info("loading brush settings from %s", saved_data)
             if saved_data is None:
-                self.initialize_defaults()
+                self.initialize_defaults(apply_settings=apply_settings)
                 return
             data = json.loads(saved_data)
             self.primary_settings = PaintModeSettings().from_dict(data['common'])
             self.mode_settings = to_int_keys(data['mode_settings'])
             self.projection_settings = to_int_keys(data['projection_settings'])
-            self.apply_settings()
+            if apply_settings:
+                self.apply_settings()
         except Exception as err:
             log.info(err)
 
-    def setup_maya_option_var_persistence(self):
+    def setup_maya_option_var_persistence(self, apply_settings=True):
         from ngSkinTools2.ui import options
 
         val = options.PersistentValue(options.VAR_OPTION_PREFIX + "_brush_settings")
 
         self.storage_func_load = val.get
         self.storage_func_save = val.set
-        self.load_settings()
+        self.load_settings(apply_settings=apply_settings)
 
     def __bake_settings(self, mode):
         result = copy.copy(self.primary_settings)
@@ -285,7 +289,7 @@ class PaintSettingsModel(Object):
         self.apply_settings_func(primary, alternative, inverted)
         self.__save_settings()
 
-    def initialize_defaults(self):
+    def initialize_defaults(self, apply_settings=True):
         self.primary_settings = PaintModeSettings()
         self.primary_settings.mode = PaintMode.replace
         self.primary_settings.brush_radius = 2
@@ -325,7 +329,8 @@ class PaintSettingsModel(Object):
                 "brush_radius": 100,
             },
         }
-        self.apply_settings()
+        if apply_settings:
+            self.apply_settings()
 
     # noinspection PyMethodMayBeStatic
     def apply_plugin_settings(self, primary, alternative, inverted):
@@ -377,8 +382,8 @@ class DisplaySettings(Object):
 class PaintTool(PaintSettingsModel):
     __paint_context = None
 
-    def __init__(self):
-        PaintSettingsModel.__init__(self)
+    def __init__(self, apply_settings=True):
+        PaintSettingsModel.__init__(self, apply_settings=apply_settings)
         self.display_settings = DisplaySettings()
 
     def update_plugin_brush_radius(self):
@@ -422,30 +427,45 @@ class Popups(Object):
 popups = Popups()
 
 
-class TabletEventFilter(QtCore.QObject):
-    def __init__(self):
-        QtCore.QObject.__init__(self)
-        self.pressure = 1.0
+def __create_tablet_event_filter():
+    from PySide2 import QtCore
+
+    class TabletEventFilter(QtCore.QObject):
+        def __init__(self):
+            QtCore.QObject.__init__(self)
+            self.pressure = 1.0
+
+        def eventFilter(self, obj, event):
+            if event.type() in [QtCore.QEvent.TabletPress, QtCore.QEvent.TabletMove]:
+                self.pressure = event.pressure()
+                # log.info("tablet pressure: %r", self.pressure)
+
+            return QtCore.QObject.eventFilter(self, obj, event)
 
-    def eventFilter(self, obj, event):
-        if event.type() in [QtCore.QEvent.TabletPress, QtCore.QEvent.TabletMove]:
-            self.pressure = event.pressure()
-            # log.info("tablet pressure: %r", self.pressure)
+        def install(self):
+            from ngSkinTools2.ui import qt
 
-        return QtCore.QObject.eventFilter(self, obj, event)
+            log.info("installing event filter...")
+            qt.mainWindow.installEventFilter(self)
+            log.info("...done")
 
-    def install(self):
-        from ngSkinTools2.ui import qt
+        def uninstall(self):
+            from ngSkinTools2.ui import qt
 
-        log.info("installing event filter...")
-        qt.mainWindow.installEventFilter(self)
-        log.info("...done")
+            qt.mainWindow.removeEventFilter(self)
+            log.info("event filter uninstalled")
 
-    def uninstall(self):
-        from ngSkinTools2.ui import qt
+    return TabletEventFilter()
 
-        qt.mainWindow.removeEventFilter(self)
-        log.info("event filter uninstalled")
 
+__tablet_event_filter = None
 
-tabletEventFilter = TabletEventFilter()
+
+def tablet_event_filter():
+    """
+    tablet pressure tracking event filter; created on first use, so that Qt is not loaded unless painting is used.
+    """
+    global __tablet_event_filter
+    if __tablet_event_filter is None:
+        __tablet_event_filter = __create_tablet_event_filter()
+    return __tablet_event_filter
@@ -3,6 +3,7 @@ UI session is running as long as any of the ngSkinTools UI windows are open.
 
 """
 import functools
+import time
 
 from ngSkinTools2 import cleanup, signal
 from ngSkinTools2.api import Layers, PaintTool, events, mirror, plugin
@@ -55,6 +56,45 @@ class Context(Object):
         self.selected_layers = ObservableValue()  # [] layerId
 
 
+class StartupProfile(Object):
+    """
+    Timings of session startup steps. Startup is split into "critical" phase, which runs before window is shown,
+    and "deferred" phase, that runs when Maya becomes idle; report is logged when deferred phase completes, and can
+    be printed any time later with `print(session.startup_profile.report())`.
+    """
+
+    class Step(Object):
+        def __init__(self, profile, phase, name):
+            self.profile = profile
+            self.phase = phase
+            self.name = name
+
+        def __enter__(self):
+            self.started = time.time()
+
+        def __exit__(self, exc_type, exc_val, exc_tb):
+            self.profile.timings.append((self.phase, self.name, time.time() - self.started))
+
+    def __init__(self):
+        self.started = time.time()
+        self.timings = []  # (phase, step name, seconds)
+
+    def measure(self, phase, name):
+        return StartupProfile.Step(self, phase, name)
+
+    def phase_total(self, phase):
+        return sum(seconds for step_phase, _, seconds in self.timings if step_phase == phase)
+
+    def report(self):
+        result = ["session startup:"]
+        for phase in ["critical", "deferred"]:
+            result.append("  {0} phase: {1:.1f}ms".format(phase, self.phase_total(phase) * 1000))
+            for step_phase, name, seconds in self.timings:
+                if step_phase == phase:
+                    result.append("    {0:8.1f}ms {1}".format(seconds * 1000, name))
+        return "\n".join(result)
+
+
 class Session(Object):
     def __init__(self):
         # reference objects that are keeping the session
@@ -64,6 +104,9 @@ class Session(Object):
         self.signal_hub = None  # type: SignalHub
         self.context = None  # type: Context
         self.licenseClient = LicenseClient()
+        self.startup_profile = None  # type: StartupProfile
+        self.paint_tool = None  # type: PaintTool
+        self.__deferred_init = []
 
         self.referenceId = 0
 
@@ -72,29 +115,66 @@ class Session(Object):
 
     def start(self):
         log.info("STARTING SESSION")
-        plugin.load_plugin()
-
-        self.paint_tool = PaintTool()
-
-        self.licenseClient.load_deferred()
-
-        self.state = State()
-        self.events = events.Events(self.state)
-        self.signal_hub = SignalHub()
-        self.signal_hub.activate()
-        cleanup.registerCleanupHandler(self.signal_hub.deactivate)
-        self.context = Context()
+        self.startup_profile = profile = StartupProfile()
+        self.__deferred_init = []
+
+        with profile.measure("critical", "load plugin"):
+            plugin.load_plugin()
+
+        with profile.measure("critical", "paint tool"):
+            # brush settings are only read here; pushing them to the plugin can wait until idle
+            self.paint_tool = PaintTool(apply_settings=False)
+        self.defer_init("apply brush settings", self.paint_tool.apply_settings)
+        self.defer_init("load license", self.licenseClient.load)
+
+        with profile.measure("critical", "events"):
+            self.state = State()
+            self.events = events.Events(self.state)
+            self.signal_hub = SignalHub()
+            self.signal_hub.activate()
+            cleanup.registerCleanupHandler(self.signal_hub.deactivate)
+            self.context = Context()
 
         @signal.on(self.events.targetChanged)
         def on_target_change():
             log.info("clearing target context")
             self.context.selected_layers.set([])
 
-        self.events.nodeSelectionChanged.emit()
+        with profile.measure("critical", "initial selection"):
+            self.events.nodeSelectionChanged.emit()
+
+    def defer_init(self, name, func):
+        """
+        schedule initialization step that is not needed to display the UI; steps run in order when Maya becomes idle,
+        and are skipped if session ends before that.
+
+        :param str name: step name for startup report
+        :param func: function without arguments
+        """
+        from maya import utils
+
+        self.__deferred_init.append((name, func))
+        if len(self.__deferred_init) == 1:
+            utils.executeDeferred(self.__run_deferred_init)
+
+    def __run_deferred_init(self):
+        steps, self.__deferred_init = self.__deferred_init, []
+        if not self.active():
+            return
+
+        for name, func in steps:
+            with self.startup_profile.measure("deferred", name):
+                try:
+                    func()
+                except Exception as err:
+                    log.error("deferred init step '%s' failed: %s", name, err)
+
+        log.info(self.startup_profile.report())
 
     def end(self):
         log.info("ENDING SESSION")
         cleanup.cleanup()
+        self.__deferred_init = []
         self.state = None
         self.events = None
         self.context = None
@@ -0,0 +1,137 @@
+"""
+Export and import of mirror symmetry setup, so that it can be reused on meshes with identical topology.
+
+Vertex symmetry itself is computed inside the plugin, either from the mesh or from the symmetry mesh connected with
+`Mirror.set_reference_mesh`; the symmetry mesh is the only input that Python side controls. A symmetry map file
+therefore stores the symmetry mesh points together with mirror settings, and is tied to the mesh topology: importing
+it recreates the symmetry mesh on any mesh with the same topology hash, without manual setup.
+
+File layout (little endian): magic, uint32 header length, json header, float32 x,y,z for each vertex.
+"""
+import hashlib
+import json
+import struct
+
+from ngSkinTools2.api import target_info
+from ngSkinTools2.api.log import getLogger
+from ngSkinTools2.api.mirror import Mirror
+
+log = getLogger("symmetry map")
+
+MAGIC = b"NGST2SYM"
+FORMAT_VERSION = 1
+
+
+def _mesh_fn(node):
+    from maya.api import OpenMaya as om
+
+    selection = om.MSelectionList()
+    selection.add(node)
+    path = selection.getDagPath(0)
+    if path.apiType() != om.MFn.kMesh:
+        path.extendToShape()
+    return om.MFnMesh(path)
+
+
+def _skinned_mesh(target):
+    from maya import cmds
+
+    skin_cluster = target_info.get_related_skin_cluster(target)
+    if skin_cluster is None:
+        raise Exception("{0} is not skinned".format(target))
+    return cmds.skinCluster(skin_cluster, q=True, geometry=True)[0]
+
+
+def topology_hash(mesh):
+    """
+    hash of mesh face-vertex lists; meshes with the same topology hash have the same vertex order.
+
+    :rtype: str
+    """
+    counts, indices = _mesh_fn(mesh).getVertices()
+    digest = hashlib.sha1()
+    digest.update(struct.pack("<%di" % len(counts), *counts))
+    digest.update(struct.pack("<%di" % len(indices), *indices))
+    return digest.hexdigest()
+
+
+def export_symmetry_map(target, file):
+    """
+    save symmetry mesh and mirror settings of the target into a file.
+
+    :param str target: skinned mesh or skin cluster with symmetry mesh configured
+    :param str file: destination file path
+    """
+    from maya.api import OpenMaya as om
+
+    m = Mirror(target)
+    reference_mesh = m.get_reference_mesh()
+    if not reference_mesh:
+        raise Exception("symmetry mesh is not configured for {0}".format(target))
+
+    mesh = _skinned_mesh(target)
+    points = _mesh_fn(reference_mesh).getPoints(om.MSpace.kObject)
+
+    header = {
+        "version": FORMAT_VERSION,
+        "topology": topology_hash(mesh),
+        "vertexCount": len(points),
+        "axis": m.axis,
+        "seamWidth": m.seam_width,
+        "vertexTransferMode": m.vertex_transfer_mode,
+        "influenceMappingOptions": m.get_mirror_config(),
+    }
+    header = json.dumps(header).encode("utf-8")
+
+    with open(file, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        f.write(struct.pack("<%df" % (len(points) * 3), *[c for p in points for c in (p.x, p.y, p.z)]))
+
+
+def read_symmetry_map(file):
+    """
+    :return: (header dict, flat list of x,y,z point coordinates)
+    """
+    with open(file, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise Exception("{0} is not a symmetry map file".format(file))
+        (header_length,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(header_length).decode("utf-8"))
+        data = f.read()
+
+    return header, list(struct.unpack("<%df" % (len(data) // 4), data))
+
+
+def import_symmetry_map(target, file):
+    """
+    recreate symmetry mesh and mirror settings from a file. Target mesh must have the same topology as the mesh the
+    file was exported from.
+
+    :param str target: skinned mesh or skin cluster, without symmetry mesh
+    :param str file: symmetry map file path
+    :return: created symmetry mesh
+    """
+    from maya.api import OpenMaya as om
+
+    header, coords = read_symmetry_map(file)
+
+    mesh = _skinned_mesh(target)
+    if len(coords) != header["vertexCount"] * 3 or topology_hash(mesh) != header["topology"]:
+        raise Exception("symmetry map {0} was exported for a mesh with different topology".format(file))
+
+    m = Mirror(target)
+    m.axis = header["axis"]
+    m.seam_width = header["seamWidth"]
+    m.vertex_transfer_mode = header["vertexTransferMode"]
+    m.set_mirror_config(header["influenceMappingOptions"])
+
+    result = m.build_reference_mesh()
+    if result is None:
+        raise Exception("{0} does not have layers initialized".format(target))
+    _mesh_fn(result).setPoints(
+        om.MPointArray([om.MPoint(coords[i], coords[i + 1], coords[i + 2]) for i in range(0, len(coords), 3)]), om.MSpace.kObject
+    )
+    log.info("symmetry map %s loaded onto %s", file, target)
+    return result
@@ -1,8 +1,10 @@
 import json
+from collections import OrderedDict
 
 from maya import cmds
 
 from ngSkinTools2.api import plugin
+from ngSkinTools2.api.python_compatibility import Object
 
 
 def get_related_skin_cluster(target):
@@ -84,3 +86,156 @@ def is_slow_mode_skin_cluster(target):
     :param str target: target mesh or skin cluster
     """
     return plugin.ngst2Layers(target, q=True, skinClusterWriteMode=True) == "plug"
+
+
+class ResolvedTarget(Object):
+    def __init__(self, skin_cluster=None, data_node=None, layers_enabled=False, dq_mode=False):
+        self.skin_cluster = skin_cluster
+        self.data_node = data_node
+        self.layers_enabled = layers_enabled
+        self.dq_mode = dq_mode
+
+
+class TargetResolutionCache(Object):
+    """
+    Remembers what selected nodes resolve to (skin cluster, data node, layers enabled, DQ skinning), so that selecting
+    the same skinned node again does not need any scene queries. Nodes that don't resolve to a skin cluster (e.g. rig
+    controls) are neither cached nor watched.
+
+    Entries are dropped with OpenMaya node callbacks when the node, skin cluster or data node is deleted or renamed,
+    when skin cluster's geometry or data node connections change, or when skin cluster's skinning method changes.
+    Cache holds up to `max_entries` most recently resolved nodes; callbacks of evicted entries are removed.
+    """
+
+    max_entries = 100
+
+    #: skin cluster plugs that get connected when influences are added or removed; not relevant for resolution
+    influence_plugs = ("matrix", "bindPreMatrix", "lockWeights", "influenceColor")
+
+    def __init__(self):
+        self.entries = OrderedDict()  #: node -> ResolvedTarget, least recently resolved first
+        self.watched = {}  #: node -> watched nodes of the entry
+        self.dependencies = {}  #: watched node -> set of dependent entry keys
+        self.callbacks = {}  #: watched node -> list of callback IDs
+        self.stale_callbacks = []  #: callbacks of nodes no longer watched; removed outside of callback execution
+
+    def resolve(self, node):
+        """
+        :rtype: ResolvedTarget
+        """
+        self.__remove_stale_callbacks()
+
+        result = self.entries.pop(node, None)
+        if result is not None:
+            self.entries[node] = result
+            return result
+
+        result = ResolvedTarget()
+        result.skin_cluster = get_related_skin_cluster(node)
+        if result.skin_cluster is None:
+            return result
+
+        result.layers_enabled = plugin.ngst2Layers(result.skin_cluster, q=True, lda=True)
+        result.data_node = get_related_data_node(result.skin_cluster) if result.layers_enabled else None
+        result.dq_mode = cmds.getAttr(result.skin_cluster + ".skinningMethod") == 2
+
+        self.entries[node] = result
+        self.watched[node] = []
+        self.__watch(node, node)
+        self.__watch(result.skin_cluster, node, self.__skin_cluster_attribute_changed)
+        if result.data_node is not None:
+            self.__watch(result.data_node, node, self.__data_node_attribute_changed)
+
+        while len(self.entries) > self.max_entries:
+            self.__drop_entry(next(iter(self.entries)))
+        self.__remove_stale_callbacks()
+
+        return result
+
+    def __skin_cluster_attribute_changed(self, msg, plug):
+        from maya import OpenMaya as om
+
+        name = om.MFnAttribute(plug.attribute()).name()
+        if msg & (om.MNodeMessage.kConnectionMade | om.MNodeMessage.kConnectionBroken):
+            return name not in self.influence_plugs
+        return bool(msg & om.MNodeMessage.kAttributeSet) and name == "skinningMethod"
+
+    @staticmethod
+    def __data_node_attribute_changed(msg, plug):
+        from maya import OpenMaya as om
+
+        if not msg & (om.MNodeMessage.kConnectionMade | om.MNodeMessage.kConnectionBroken):
+            return False
+        return om.MFnAttribute(plug.attribute()).name() != "mirrorMesh"
+
+    def __watch(self, watched_node, dependent, is_relevant_change=None):
+        """
+        :param is_relevant_change: function (message, plug) that tells if attribute change on this node invalidates
+            dependent entries; when not provided, attribute changes are not watched
+        """
+        from maya import OpenMaya as om
+
+        self.dependencies.setdefault(watched_node, set()).add(dependent)
+        self.watched[dependent].append(watched_node)
+        if watched_node in self.callbacks:
+            return
+
+        def forget(*_):
+            self.invalidate(watched_node)
+
+        def attribute_changed(msg, plug, _other_plug, _client_data):
+            if is_relevant_change(msg, plug):
+                self.invalidate(watched_node)
+
+        selection = om.MSelectionList()
+        try:
+            selection.add(watched_node)
+        except RuntimeError:
+            return
+        node = om.MObject()
+        selection.getDependNode(0, node)
+
+        callbacks = self.callbacks[watched_node] = [
+            om.MNodeMessage.addNodeAboutToDeleteCallback(node, forget),
+            om.MNodeMessage.addNameChangedCallback(node, forget),
+        ]
+        if is_relevant_change is not None:
+            callbacks.append(om.MNodeMessage.addAttributeChangedCallback(node, attribute_changed))
+
+    def invalidate(self, watched_node):
+        """
+        drop entries that depend on given node
+        """
+        for i in list(self.dependencies.get(watched_node, set())):
+            self.__drop_entry(i)
+
+    def __drop_entry(self, node):
+        """
+        removes entry; nodes that were only watched for this entry are not watched anymore
+        """
+        self.entries.pop(node, None)
+        for watched_node in self.watched.pop(node, []):
+            dependencies = self.dependencies.get(watched_node, set())
+            dependencies.discard(node)
+            if not dependencies:
+                self.dependencies.pop(watched_node, None)
+                self.stale_callbacks.extend(self.callbacks.pop(watched_node, []))
+
+    def __remove_stale_callbacks(self):
+        from maya import OpenMaya as om
+
+        while self.stale_callbacks:
+            om.MMessage.removeCallback(self.stale_callbacks.pop())
+
+    def clear(self):
+        for callbacks in self.callbacks.values():
+            self.stale_callbacks.extend(callbacks)
+        self.__remove_stale_callbacks()
+
+        self.entries = OrderedDict()
+        self.watched = {}
+        self.dependencies = {}
+        self.callbacks = {}
+
+
+resolution_cache = TargetResolutionCache()
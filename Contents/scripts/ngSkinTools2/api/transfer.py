@@ -1,13 +1,23 @@
 import itertools
 
+from ngSkinTools2.api.log import getLogger
 from ngSkinTools2.api.python_compatibility import Object
-from ngSkinTools2.decorators import undoable
+from ngSkinTools2.decorators import Undo, undoable
 
 from . import plugin
 from .influenceMapping import InfluenceMapping, InfluenceMappingConfig
 from .layers import init_layers, target_info
 from .mirror import Mirror
 from .suspend_updates import suspend_updates
+from .vertex_correspondence import (
+    file_fingerprint,
+    fingerprint_topology,
+    is_identical_geometry,
+    mesh_fingerprint,
+    mesh_topology,
+)
+
+log = getLogger("transfer")
 
 
 class VertexTransferMode(Object):
@@ -20,38 +30,134 @@ class VertexTransferMode(Object):
     vertexId = 'vertexId'  #: Vertices are matched by ID. Not usable for mirroring; this is used for transfer/import cases where meshes are known to be identical
 
 
+REFERENCE_MESH = "-reference-mesh-"
+
+
+def load_reference_mesh_from_file(file, format, layers=None, influences=None):
+    """
+    Loads exported file into plugin's in-memory reference mesh, which then can be used as a transfer source
+    (`REFERENCE_MESH`) for as many transfers as needed.
+
+    :param list layers: if provided, only layers with these names or IDs are loaded
+    :param list influences: if provided, only weights of these influences (paths, names or logical indexes) are loaded
+    :return: list of source influences, as `InfluenceInfo` objects
+    :rtype: list[InfluenceInfo]
+    """
+    from .export_data import LayerFilter
+    from .import_export import FileFormatWrapper
+
+    data_filter = LayerFilter(layers=layers, influences=influences)
+    with FileFormatWrapper(file, format=format, read_mode=True, data_filter=data_filter) as f:
+        data = plugin.ngst2tools(
+            tool="importJsonFile",
+            file=f.plain_file,
+        )
+
+    return target_info.unserialize_influences_from_json_data(data['influences'])
+
+
+def influences_key(influences):
+    """
+    builds a hashable key for the influence list; two influence lists with the same key will produce identical
+    influence mapping for the same source and mapping config.
+
+    :type influences: list[InfluenceInfo]
+    """
+    return tuple(
+        sorted(
+            (
+                i.logicalIndex,
+                i.path,
+                i.name,
+                i.labelText,
+                i.labelSide,
+                None if i.pivot is None else tuple(i.pivot),
+            )
+            for i in influences or []
+        )
+    )
+
+
 class LayersTransfer(Object):
     def __init__(self):
         self.source = None
         self.target = None
         self.source_file = None
+        self.source_format = None
         self.vertex_transfer_mode = VertexTransferMode.closestPoint
         self.influences_mapping = InfluenceMapping()
         self.influences_mapping.config = InfluenceMappingConfig.transfer_defaults()
         self.keep_existing_layers = True
         self.customize_callback = None
 
-    def load_source_from_file(self, file, format):
-        from .import_export import FileFormatWrapper
+        # optional dict, shared between transfers from the same source: destination influences key -> flat mapping list
+        self.mapping_cache = None
 
-        with FileFormatWrapper(file, format=format, read_mode=True) as f:
-            data = plugin.ngst2tools(
-                tool="importJsonFile",
-                file=f.plain_file,
-            )
+        # when source and destination geometry is identical, match vertices by ID instead of searching closest points
+        self.reuse_vertex_correspondence = True
+        self.source_fingerprint = None
 
-        self.source = "-reference-mesh-"
+    def load_source_from_file(self, file, format, layers=None, influences=None):
+        """
+        :param list layers: if provided, only layers with these names or IDs are transferred
+        :param list influences: if provided, only weights of these influences are transferred
+        """
+        self.source = REFERENCE_MESH
         self.source_file = file
-        influences = target_info.unserialize_influences_from_json_data(data['influences'])
+        self.source_format = format
+        self.influences_mapping.influences = load_reference_mesh_from_file(file, format, layers=layers, influences=influences)
+
+    def resolve_vertex_transfer_mode(self):
+        """
+        returns vertex transfer mode to be used for the plugin call: `closestPoint` is replaced with `vertexId` if
+        source and destination vertices are known to be identical.
+        """
+        if not self.reuse_vertex_correspondence or self.vertex_transfer_mode != VertexTransferMode.closestPoint:
+            return self.vertex_transfer_mode
+
+        try:
+            if self.source_file is not None and self.source_fingerprint is None:
+                self.source_fingerprint = file_fingerprint(self.source_file)
+                if self.source_fingerprint is None:
+                    return self.vertex_transfer_mode
+
+            # counts are compared before hashing any vertex positions
+            if self.source_fingerprint is not None:
+                source_topology = fingerprint_topology(self.source_fingerprint)
+            else:
+                source_topology = mesh_topology(self.source)
+            if source_topology is None or source_topology != mesh_topology(self.target):
+                return self.vertex_transfer_mode
+
+            if self.source_fingerprint is None:
+                self.source_fingerprint = mesh_fingerprint(self.source)
+
+            if is_identical_geometry(self.source_fingerprint, mesh_fingerprint(self.target)):
+                log.info("source and destination geometry is identical, transferring by vertex ID")
+                return VertexTransferMode.vertexId
+        except (RuntimeError, IOError, OSError) as err:
+            # maya API errors for unexpected node types, unreadable sidecar files
+            log.info("could not compare source and destination geometry: %s", err)
 
-        self.influences_mapping.influences = influences
+        return self.vertex_transfer_mode
 
     def calc_influences_mapping_as_flat_list(self):
+        cache_key = None
+        if self.mapping_cache is not None:
+            cache_key = influences_key(self.influences_mapping.destinationInfluences)
+            cached = self.mapping_cache.get(cache_key, None)
+            if cached is not None:
+                return cached
+
         mapping_pairs = list(self.influences_mapping.asIntIntMapping(self.influences_mapping.calculate()).items())
         if len(mapping_pairs) == 0:
             raise Exception("no mapping between source and destination influences")
         # convert dict to flat array
-        return list(itertools.chain.from_iterable(mapping_pairs))
+        result = list(itertools.chain.from_iterable(mapping_pairs))
+
+        if cache_key is not None:
+            self.mapping_cache[cache_key] = result
+        return result
 
     def execute(self):
         # sanity check: destination must be skinnable target
@@ -69,6 +175,8 @@ class LayersTransfer(Object):
         else:
             self.customize_callback(self)
 
+        return True
+
     @undoable
     def complete_execution(self):
         l = init_layers(self.target)
@@ -82,7 +190,7 @@ class LayersTransfer(Object):
                 tool="transfer",
                 source=self.source,
                 target=self.target,
-                vertexTransferMode=self.vertex_transfer_mode,
+                vertexTransferMode=self.resolve_vertex_transfer_mode(),
                 influencesMapping=self.calc_influences_mapping_as_flat_list(),
             )
 
@@ -108,3 +216,98 @@ def transfer_layers(
     t.influences_mapping.config = influences_mapping_config
 
     t.execute()
+
+
+class BatchLayersTransfer(Object):
+    """
+    Transfers layers from a single source into many destinations (LOD chains, crowd variants, etc).
+
+    Source is parsed only once, and influence mapping is calculated once per each unique destination influences list;
+    all destinations are processed inside a single undo chunk.
+    """
+
+    def __init__(self):
+        self.source = None
+        self.source_file = None
+        self.targets = []
+        self.vertex_transfer_mode = VertexTransferMode.closestPoint
+        self.influences_mapping_config = InfluenceMappingConfig.transfer_defaults()
+        self.keep_existing_layers = True
+
+        self.source_influences = None  # type: list[InfluenceInfo]
+        self.mapping_cache = {}
+        self.source_format = None
+        self.source_fingerprint = None
+
+    def load_source_from_file(self, file, format, layers=None, influences=None):
+        self.source = REFERENCE_MESH
+        self.source_file = file
+        self.source_format = format
+        self.source_influences = load_reference_mesh_from_file(file, format, layers=layers, influences=influences)
+        self.mapping_cache = {}
+        self.source_fingerprint = None
+
+    def build_transfer(self, target):
+        """
+        creates a `LayersTransfer` for the given target, sharing parsed source data and influence mapping cache.
+
+        :rtype: LayersTransfer
+        """
+        t = LayersTransfer()
+        t.source = self.source
+        t.source_file = self.source_file
+        t.source_format = self.source_format
+        t.source_fingerprint = self.source_fingerprint
+        t.target = target
+        t.vertex_transfer_mode = self.vertex_transfer_mode
+        t.keep_existing_layers = self.keep_existing_layers
+        t.influences_mapping.config = self.influences_mapping_config
+        t.influences_mapping.influences = self.source_influences
+        t.mapping_cache = self.mapping_cache
+        return t
+
+    def execute(self):
+        """
+        :return: list of targets that layers were transferred to; targets that are not skinnable are skipped.
+        :rtype: list[str]
+        """
+        if self.source_influences is None:
+            if target_info.get_related_skin_cluster(self.source) is None:
+                return []
+            self.source_influences = target_info.list_influences(self.source)
+
+        result = []
+        with Undo(name="transfer_layers_batch"):
+            for target in self.targets:
+                t = self.build_transfer(target)
+                if t.execute():
+                    result.append(target)
+                    self.source_fingerprint = t.source_fingerprint
+                else:
+                    log.info("skipping transfer to %s: not a skinned target", target)
+
+        return result
+
+
+def transfer_layers_batch(
+    source, destinations, vertex_transfer_mode=VertexTransferMode.closestPoint, influences_mapping_config=InfluenceMappingConfig.transfer_defaults()
+):
+    """
+    Transfer skinning layers from one source to many destination meshes. This is the same as calling
+    :py:func:`transfer_layers` for each destination, but source influences are queried only once, influence mapping
+    is reused for destinations with identical influences, and the whole batch is a single undo step.
+
+    :param str source: source mesh or skin cluster node name
+    :param list[str] destinations: destination mesh or skin cluster node names
+    :param str vertex_transfer_mode: describes how source mesh vertices are mapped to destination vertices. Defaults to `closestPoint`
+    :param InfluenceMappingConfig influences_mapping_config: configuration for InfluenceMapping
+    :return: list of destinations that layers were transferred to
+    """
+
+    t = BatchLayersTransfer()
+    t.source = source
+    t.targets = list(destinations)
+    t.vertex_transfer_mode = vertex_transfer_mode
+    t.influences_mapping_config = influences_mapping_config
+
+    return t.execute()
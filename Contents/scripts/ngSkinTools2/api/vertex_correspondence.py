@@ -0,0 +1,221 @@
+"""
+Detects when transfer source and destination have identical geometry, so that transfer can skip closest point
+search and match vertices by ID instead.
+
+When every destination vertex sits exactly on the source vertex with the same ID, closest point matching resolves
+each vertex to itself, and `VertexTransferMode.vertexId` produces the same result for a fraction of the cost.
+
+Geometry is compared through mesh fingerprints: topology (vertex, edge and polygon counts) and a hash of rounded
+object-space and world-space positions of the deformed mesh, so that meshes only compare equal if they coincide in
+either space, whichever space the plugin is matching vertices in. Topology is compared first, so that positions are
+only hashed for meshes that can possibly match.
+
+Fingerprint of exported file is the fingerprint of the mesh it was exported from, taken at export time and saved
+into a `<file>.fingerprint` sidecar; exported file itself is never parsed for this. Files without a sidecar (older
+exports, files written by other tools) are always transferred with closest point search. Fingerprints are also
+kept in a local cache keyed by file path, size and modification time; cache is written once per export and holds
+fingerprints of most recent exports only.
+"""
+import hashlib
+import json
+import os
+import struct
+from collections import OrderedDict
+
+from maya import cmds
+
+from ngSkinTools2.api import target_info
+from ngSkinTools2.api.log import getLogger
+from ngSkinTools2.api.python_compatibility import Object
+
+log = getLogger("vertex correspondence")
+
+POSITION_PRECISION = 10000  #: positions are rounded to 1/POSITION_PRECISION before hashing
+
+
+def points_fingerprint(flat_positions):
+    """
+    :param flat_positions: x,y,z values for first vertex, then second, etc
+    :rtype: str
+    """
+    values = [int(round(v * POSITION_PRECISION)) for v in flat_positions]
+    digest = hashlib.sha1(struct.pack("<%dq" % len(values), *values)).hexdigest()
+    return "{0}:{1}".format(len(values) // 3, digest)
+
+
+def _skinned_mesh_fn(target):
+    """
+    :rtype: maya.api.OpenMaya.MFnMesh
+    """
+    from maya.api import OpenMaya as om
+
+    skin_cluster = target_info.get_related_skin_cluster(target)
+    if skin_cluster is None:
+        return None
+
+    geometry = cmds.skinCluster(skin_cluster, q=True, geometry=True) or []
+    if not geometry:
+        return None
+
+    selection = om.MSelectionList()
+    selection.add(geometry[0])
+    return om.MFnMesh(selection.getDagPath(0))
+
+
+def _topology(mesh):
+    return "{0},{1},{2}".format(mesh.numVertices, mesh.numEdges, mesh.numPolygons)
+
+
+def mesh_topology(target):
+    """
+    cheap part of mesh fingerprint: vertex, edge and polygon counts of the mesh deformed by target's skin cluster.
+
+    :param str target: mesh or skin cluster
+    :rtype: str
+    """
+    mesh = _skinned_mesh_fn(target)
+    return None if mesh is None else _topology(mesh)
+
+
+def fingerprint_topology(fingerprint):
+    """
+    topology part of the fingerprint, as returned by `mesh_topology`
+    """
+    return None if fingerprint is None else fingerprint.split("|")[0]
+
+
+def mesh_fingerprint(target):
+    """
+    fingerprint of topology, object-space and world-space vertex positions of the mesh deformed by target's skin
+    cluster.
+
+    :param str target: mesh or skin cluster
+    :rtype: str
+    """
+    from maya.api import OpenMaya as om
+
+    mesh = _skinned_mesh_fn(target)
+    if mesh is None:
+        return None
+
+    return "|".join(
+        [_topology(mesh)]
+        + [points_fingerprint([c for p in mesh.getPoints(space) for c in (p.x, p.y, p.z)]) for space in (om.MSpace.kObject, om.MSpace.kWorld)]
+    )
+
+
+class FingerprintCache(Object):
+    """
+    on-disk storage for file fingerprints: "path|size|mtime" -> fingerprint, for `max_entries` most recent files
+    """
+
+    max_entries = 200
+
+    def __init__(self, path=None):
+        self.path = path
+        self.__entries = None
+
+    def default_path(self):
+        return os.path.join(cmds.internalVar(userAppDir=True), "ngSkinTools2", "vertex_correspondence.json")
+
+    @staticmethod
+    def file_key(file):
+        stat = os.stat(file)
+        return "{0}|{1}|{2}".format(os.path.abspath(file), stat.st_size, int(stat.st_mtime))
+
+    def __load(self):
+        if self.__entries is not None:
+            return self.__entries
+
+        if self.path is None:
+            self.path = self.default_path()
+
+        self.__entries = OrderedDict()
+        # noinspection PyBroadException
+        try:
+            with open(self.path) as f:
+                self.__entries = json.load(f, object_pairs_hook=OrderedDict)
+        except Exception:
+            pass
+        return self.__entries
+
+    def get(self, file):
+        return self.__load().get(self.file_key(file), None)
+
+    def set(self, file, fingerprint, save=True):
+        """
+        :param save: if False, entry is only kept in memory until the next save
+        """
+        entries = self.__load()
+        key = self.file_key(file)
+
+        # previous versions of the same file
+        path_prefix = key[: key.rindex("|", 0, key.rindex("|")) + 1]
+        for i in [i for i in entries if i.startswith(path_prefix)]:
+            del entries[i]
+
+        entries[key] = fingerprint
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+        if not save:
+            return
+
+        # noinspection PyBroadException
+        try:
+            directory = os.path.dirname(self.path)
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            with open(self.path, 'w') as f:
+                json.dump(entries, f)
+        except Exception as err:
+            log.error("could not save vertex correspondence cache: %s", err)
+
+
+file_fingerprints = FingerprintCache()
+
+
+def sidecar_path(file):
+    return file + ".fingerprint"
+
+
+def save_file_fingerprint(file, fingerprint):
+    """
+    record fingerprint of the mesh that `file` was just exported from.
+    """
+    if fingerprint is None:
+        return
+
+    with open(sidecar_path(file), 'w') as f:
+        json.dump({"fingerprint": fingerprint, "size": os.path.getsize(file)}, f)
+    file_fingerprints.set(file, fingerprint)
+
+
+def file_fingerprint(file):
+    """
+    fingerprint of the mesh that file was exported from, or None if it's not known; exported file is not parsed.
+
+    :rtype: str
+    """
+    result = file_fingerprints.get(file)
+    if result is not None:
+        return result
+
+    try:
+        with open(sidecar_path(file)) as f:
+            sidecar = json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+    if sidecar.get("size", None) != os.path.getsize(file):
+        # file was overwritten without updating the sidecar
+        return None
+
+    result = sidecar.get("fingerprint", None)
+    if result is not None:
+        file_fingerprints.set(file, result, save=False)
+    return result
+
+
+def is_identical_geometry(source_fingerprint, destination_fingerprint):
+    return source_fingerprint is not None and source_fingerprint == destination_fingerprint
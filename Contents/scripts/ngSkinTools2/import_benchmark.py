@@ -0,0 +1,44 @@
+"""
+Measures how long it takes to import `ngSkinTools2.api` in a fresh interpreter, and checks that no Qt or UI modules
+get loaded along the way. Run with mayapy:
+
+    mayapy -m ngSkinTools2.import_benchmark [repeats]
+
+Each run is a separate process, so that module caches from the previous run do not affect the result.
+"""
+from __future__ import print_function
+
+import json
+import subprocess
+import sys
+
+MEASURE_SCRIPT = """
+import json, sys, time
+started = time.time()
+import ngSkinTools2.api
+elapsed = time.time() - started
+heavy = sorted(m for m in sys.modules if m.split('.')[0] in ('PySide2', 'PySide6', 'shiboken2') or m.startswith('ngSkinTools2.ui'))
+print(json.dumps({'seconds': elapsed, 'heavy_modules': heavy}))
+"""
+
+
+def measure_once():
+    output = subprocess.check_output([sys.executable, "-c", MEASURE_SCRIPT])
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def run(repeats=5):
+    """
+    :return: (median import seconds, list of Qt/UI modules that were imported)
+    """
+    results = [measure_once() for _ in range(repeats)]
+    timings = sorted(r['seconds'] for r in results)
+    return timings[len(timings) // 2], results[-1]['heavy_modules']
+
+
+if __name__ == "__main__":
+    median, heavy_modules = run(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
+    print("import ngSkinTools2.api: {0:.1f}ms (median)".format(median * 1000))
+    if heavy_modules:
+        print("Qt/UI modules imported: " + ", ".join(heavy_modules))
+        sys.exit(1)
@@ -1,8 +1,9 @@
 """
 DESCRIPTION:
-    This file is an additional function menu in the NGSkin Tool window. It has two menus:
+    This file is an additional function menu in the NGSkin Tool window. It has three menus:
     1. Retrieving data joints that have already been exported.
     2. Binding the geo selected with the joints data and then running the imported layer window.
+    3. Binding many selected geos with the joints data and importing layers without the import layer window.
 
 USAGE:
     1. Run the "Select all the joint list" then all the joints in the scene will be selected according to the .json data.
@@ -10,11 +11,17 @@ USAGE:
        - Run the "Binding skin and import layer.."
        - The geo will be bound to the joints in the scene according to the .json data.
        - Import layer window will be run automatically.
+    3. - Select any number of geos without the skin weight.
+       - Run the "Binding skin and import layer (batch).." and pick one or more .json files.
+       - With one file, all geos are bound and imported from it; with many files, each geo uses the file that
+         is named after it (e.g. "body_geo.json" for "body_geo").
 
 AUTHOR:
     Adien Dendra - adendra@ilm.com
 
 """
+import os
+
 from PySide2 import QtWidgets
 import maya.cmds as cmds
 import maya.mel as mel
@@ -25,6 +32,9 @@ from ngSkinTools2 import api
 from ngSkinTools2.ui.options import PersistentValue
 from ngSkinTools2.api import plugin
 from ngSkinTools2.api.import_export import FileFormatWrapper
+from ngSkinTools2.api.python_compatibility import Object
+from ngSkinTools2.api.transfer import BatchLayersTransfer
+from ngSkinTools2.decorators import Undo
 
 filter_normal_json = 'JSON files(*.json)'
 filter_compressed = 'Compressed JSON(*.json.gz)'
@@ -37,28 +47,110 @@ format_map = {
 
 default_filter = PersistentValue("default_import_filter", default_value=api.FileFormat.JSON)
 
-def ilm_data_list(file_name, selected_format):
-
+def strip_namespaces(path):
+    return "|".join(name.split(":")[-1] for name in path.split("|"))
+
+
+class JointResolution(Object):
+    """
+    result of matching influence paths from a file against scene joints
+    """
+
+    def __init__(self):
+        self.matched = []  #: list of (file path, scene path)
+        self.ambiguous = []  #: list of (file path, list of candidate scene paths)
+        self.missing = []  #: list of file paths
+
+    def scene_joints(self):
+        """
+        matched scene joints, each listed once, in file order
+        """
+        result = []
+        seen = set()
+        for _, scene_path in self.matched:
+            if scene_path not in seen:
+                seen.add(scene_path)
+                result.append(scene_path)
+        return result
+
+    def report_problems(self):
+        def names(paths):
+            return ", ".join(path.split("|")[-1] for path in paths)
+
+        if self.missing:
+            cmds.warning("{0} joint(s) don't exist in the scene, skip: {1}".format(len(self.missing), names(self.missing)))
+        if self.ambiguous:
+            cmds.warning(
+                "{0} joint(s) match multiple scene joints, skip: {1}".format(len(self.ambiguous), names([i[0] for i in self.ambiguous]))
+            )
+
+
+class SceneJointIndex(Object):
+    """
+    Lookup of scene joints, built with a single scene query. Joint paths are resolved by exact path first, then by
+    path with namespaces removed, then by leaf name (also without namespace).
+    """
+
+    def __init__(self, joints=None):
+        if joints is None:
+            joints = cmds.ls(type='joint', long=True) or []
+
+        self.paths = set(joints)
+        self.by_stripped_path = {}
+        self.by_leaf = {}
+        for path in joints:
+            stripped = strip_namespaces(path)
+            self.by_stripped_path.setdefault(stripped, []).append(path)
+            self.by_leaf.setdefault(stripped.split("|")[-1], []).append(path)
+
+    def candidates(self, path):
+        if path in self.paths:
+            return [path]
+
+        stripped = strip_namespaces(path)
+        result = self.by_stripped_path.get(stripped, None)
+        if result:
+            return result
+
+        return self.by_leaf.get(stripped.split("|")[-1], [])
+
+    def resolve(self, paths):
+        """
+        :type paths: list[str]
+        :rtype: JointResolution
+        """
+        result = JointResolution()
+        for path in paths:
+            candidates = self.candidates(path)
+            if not candidates:
+                result.missing.append(path)
+            elif len(candidates) > 1:
+                result.ambiguous.append((path, candidates))
+            else:
+                result.matched.append((path, candidates[0]))
+        return result
+
+
+def ilm_resolve_joints(file_name, selected_format):
+    """
+    matches influences stored in the file against scene joints
+
+    :rtype: JointResolution
+    """
     with FileFormatWrapper(file_name, format=format_map[selected_format], read_mode=True) as f:
         data = plugin.ngst2tools(
             tool="importJsonFile",
             file=f.plain_file,
         )
 
-    # query the joint data
-    data_values = (data.values())
-    jointsSelectList = []
-    for values in data_values:
-        jointsSelectList = [(item['path']) for item in values]
+    return SceneJointIndex().resolve([item['path'] for item in data['influences']])
+
 
-    newList = []
-    for object in jointsSelectList:
-        if cmds.objExists(object):
-            newList.append(object)
-        else:
-            objectName = object.split("|")
-            cmds.warning("'{}'{}".format(objectName[-1], " doesn't exist in the scene, skip!"))
+def ilm_data_list(file_name, selected_format):
+    resolution = ilm_resolve_joints(file_name, selected_format)
+    resolution.report_problems()
 
+    newList = resolution.scene_joints()
     if not newList:
         raise IndexError('Nothing object is matched between the data and the scene!')
 
@@ -160,3 +252,123 @@ def ilm_bindSkinAndImportLayer(parent, file_dialog_func=None):
     result = actions.define_action(parent, "Binding skin and import layer..", callback=import_callback_bindSkin, tooltip="Load previously layers exported weights")
 
     return result
+
+
+def ilm_unskinned_geometry(selection):
+    """
+    returns transforms of mesh geometry in selection that is not skinned yet
+
+    :type selection: list[str]
+    """
+    result = []
+    for mesh in cmds.ls(selection, dag=True, type="mesh", long=True, noIntermediate=True) or []:
+        geo = cmds.listRelatives(mesh, parent=True, fullPath=True)[0]
+        if geo in result:
+            continue
+        if mel.eval('findRelatedSkinCluster "{}"'.format(geo)):
+            cmds.warning("'{}' already has a skin weight, skip!".format(geo.split("|")[-1]))
+            continue
+        result.append(geo)
+    return result
+
+
+def ilm_match_files_to_geometry(files, geometry):
+    """
+    with a single file, all geometry is imported from it; otherwise geometry is matched to file by name:
+    "body_geo.json" or "body_geo.json.gz" is used for "body_geo" (namespaces ignored).
+
+    :return: list of (file, [geometry])
+    """
+    if len(files) == 1:
+        return [(files[0], list(geometry))]
+
+    def base_name(file_name):
+        name = os.path.basename(file_name)
+        for ext in (".gz", ".json"):
+            if name.endswith(ext):
+                name = name[: -len(ext)]
+        return name
+
+    files_by_name = dict((base_name(f), f) for f in files)
+    geometry_by_file = {}
+    for geo in geometry:
+        name = strip_namespaces(geo).split("|")[-1]
+        file_name = files_by_name.get(name, None)
+        if file_name is None:
+            cmds.warning("no file is named after '{}', skip!".format(name))
+            continue
+        geometry_by_file.setdefault(file_name, []).append(geo)
+
+    return [(f, geometry_by_file[f]) for f in files if f in geometry_by_file]
+
+
+def ilm_bind_skin_and_import_batch(geometry, files, file_format, max_influences=5):
+    """
+    Binds each geometry to joints from its export file, then imports layers from that file. Each file is parsed only
+    once and imported into all its geometries as a single batch; the whole run is a single undo step.
+
+    :param list[str] geometry: unskinned geometry
+    :param list[str] files: export files, see `ilm_match_files_to_geometry`
+    :param str file_format: one of `api.FileFormat` values
+    :return: list of created skin clusters that layers were imported to
+    """
+    joint_index = SceneJointIndex()
+    result = []
+
+    with Undo(name="bind_skin_and_import_batch"):
+        for file_name, targets in ilm_match_files_to_geometry(files, geometry):
+            batch = BatchLayersTransfer()
+            batch.load_source_from_file(file_name, format=file_format)
+
+            # non-DAG influences have no path and are resolved by name
+            influence_paths = [i.path_name() for i in batch.source_influences]
+            resolution = joint_index.resolve([i for i in influence_paths if i is not None])
+            resolution.report_problems()
+            joints = resolution.scene_joints()
+            if not joints:
+                cmds.warning("no joints from '{}' exist in the scene, skip!".format(os.path.basename(file_name)))
+                continue
+
+            for geo in targets:
+                batch.targets.append(cmds.skinCluster(joints, geo, mi=max_influences, omi=False, rui=False, tsb=True)[0])
+
+            result.extend(batch.execute())
+
+    return result
+
+
+def ilm_bindSkinAndImportLayerBatch(parent, file_dialog_func=None):
+    from ngSkinTools2.ui import actions
+
+    def default_file_dialog_func():
+        file_names, selected_filter = QtWidgets.QFileDialog.getOpenFileNames(
+            parent, "Bind skin and import layer (batch)", filter=file_dialog_filters, selectedFilter=default_filter.get()
+        )
+        if file_names:
+            default_filter.set(selected_filter)
+
+        return file_names, selected_filter
+
+    if file_dialog_func is None:
+        file_dialog_func = default_file_dialog_func
+
+    def import_callback_bindSkinBatch():
+        geometry = ilm_unskinned_geometry(cmds.ls(sl=True, long=True))
+        if not geometry:
+            raise ValueError('Please select geo objects without skin weight!')
+
+        file_names, selected_format = file_dialog_func()
+        if not file_names:
+            return
+
+        skin_clusters = ilm_bind_skin_and_import_batch(geometry, file_names, format_map[selected_format])
+        om.MGlobal.displayInfo('Imported layers into {} of {} geos'.format(len(skin_clusters), len(geometry)))
+
+    result = actions.define_action(
+        parent,
+        "Binding skin and import layer (batch)..",
+        callback=import_callback_bindSkinBatch,
+        tooltip="Bind all selected geos and load previously exported layers without the import window",
+    )
+
+    return result
@@ -1,7 +1,14 @@
-from PySide2 import QtWidgets
+from maya import OpenMaya as om
+from PySide2 import QtCore, QtWidgets
 
 from ngSkinTools2 import api, signal
+from ngSkinTools2.api import vertex_correspondence
+from ngSkinTools2.api.import_export import FileFormatWrapper, export_plain_json
+from ngSkinTools2.api.log import getLogger
 from ngSkinTools2.ui.options import PersistentValue
+from ngSkinTools2.ui.parallel import StagedTask
+
+log = getLogger("import/export")
 
 filter_normal_json = 'JSON files(*.json)'
 filter_compressed = 'Compressed JSON(*.json.gz)'
@@ -15,6 +22,47 @@ format_map = {
 default_filter = PersistentValue("default_import_filter", default_value=api.FileFormat.JSON)
 
 
+def run_with_progress(parent, title, task, on_done=None):
+    """
+    runs staged task with a progress dialog; dialog's "cancel" button cancels the task before the next stage.
+
+    :type task: StagedTask
+    :param on_done: called with the task once the progress dialog is closed, regardless of the task outcome
+    """
+    from ngSkinTools2.ui import dialogs
+
+    progress = QtWidgets.QProgressDialog(title, "Cancel", 0, len(task.stages), parent)
+    progress.setWindowTitle("ngSkinTools2")
+    progress.setWindowModality(QtCore.Qt.WindowModal)
+    progress.setMinimumDuration(0)
+    progress.canceled.connect(task.cancel)
+
+    def update_progress(_, index, name):
+        progress.setLabelText(name + "...")
+        progress.setValue(index)
+
+    def done(_):
+        progress.canceled.disconnect(task.cancel)
+        progress.setValue(len(task.stages))
+        progress.deleteLater()
+
+        if on_done is not None:
+            on_done(task)
+
+        if task.error is not None:
+            dialogs.displayError(task.error)
+            return
+
+        summary = "{0} {1} ({2})".format(title, "cancelled" if task.cancelled else "finished", task.format_timings())
+        log.info(summary)
+        om.MGlobal.displayInfo('[ngSkinTools2] ' + summary)
+
+    task.add_progress_handler(update_progress)
+    task.add_done_handler(done)
+    progress.show()
+    task.start()
+
+
 def buildAction_export(session, parent):
     from ngSkinTools2.ui import actions
 
@@ -27,8 +75,31 @@ def buildAction_export(session, parent):
 
         default_filter.set(selected_filter)
 
-        if session.state.layersAvailable:
-            api.export_json(session.state.selectedSkinCluster, file_name, format=format_map[selected_filter])
+        if not session.state.layersAvailable:
+            return
+
+        target = session.state.selectedSkinCluster
+        file_format = FileFormatWrapper(file_name, format=format_map[selected_filter], read_mode=False)
+
+        fingerprint = []
+
+        def read_layers(_):
+            export_plain_json(target, file_format.plain_file)
+            fingerprint.append(vertex_correspondence.mesh_fingerprint(target))
+
+        def save_file(_):
+            # last stage, so cancelling export at any point before it leaves target file untouched
+            file_format.commit()
+            vertex_correspondence.save_file_fingerprint(file_name, fingerprint[0])
+
+        def cleanup(_):
+            file_format.cleanup()
+
+        task = StagedTask()
+        task.add_stage("Reading layers", read_layers)
+        task.add_stage("Writing file", lambda _: file_format.finish(), worker=True)
+        task.add_stage("Saving file", save_file)
+        run_with_progress(parent, "Export", task, on_done=cleanup)
 
     result = actions.define_action(
         parent,
@@ -75,10 +146,25 @@ def buildAction_import(session, parent, file_dialog_func=None):
             return
 
         t = LayersTransfer()
-        t.load_source_from_file(file_name, format=format_map[selected_format])
         t.target = session.state.selectedSkinCluster
         t.customize_callback = transfer_dialog
-        t.execute()
+        file_format = FileFormatWrapper(file_name, format=format_map[selected_format], read_mode=True)
+
+        def load_source(_):
+            t.load_source_from_file(file_format.plain_file, format=api.FileFormat.JSON)
+            # vertex correspondence is cached against the original file, not the temporary one
+            t.source_file = file_name
+            t.source_format = file_format.format
+
+        def done(task):
+            file_format.cleanup()
+            if task.is_finished():
+                t.execute()
+
+        task = StagedTask()
+        task.add_stage("Reading file", lambda _: file_format.prepare(), worker=True)
+        task.add_stage("Loading layers", load_source)
+        run_with_progress(parent, "Import", task, on_done=done)
 
     result = actions.define_action(parent, "Import Layers from Json...", callback=import_callback, tooltip="Load previously exported weights")
 
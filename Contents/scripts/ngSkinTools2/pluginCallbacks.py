@@ -23,17 +23,17 @@ def tool_settings_changed():
 
 
 def paint_tool_started():
-    api.paint.tabletEventFilter.install()
+    api.paint.tablet_event_filter().install()
     hotkeys_setup.toggle_paint_hotkey_set(enabled=True)
 
 
 def paint_tool_stopped():
-    api.paint.tabletEventFilter.uninstall()
+    api.paint.tablet_event_filter().uninstall()
     hotkeys_setup.toggle_paint_hotkey_set(enabled=False)
 
 
 def get_stylus_intensity():
-    return api.paint.tabletEventFilter.pressure
+    return api.paint.tablet_event_filter().pressure
 
 
 def initialize_influences_mirror_mapping(mesh):
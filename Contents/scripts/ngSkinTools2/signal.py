@@ -8,6 +8,8 @@ New system is changing to allow decoupling subscribers and receivers, and allowi
 
 
 """
+import weakref
+from collections import OrderedDict
 from functools import partial
 
 from ngSkinTools2 import cleanup
@@ -16,20 +18,224 @@ from ngSkinTools2.api.python_compatibility import Object
 
 log = getLogger("signal")
 
+#: when set (see `signal_profiler.start`), every queued handler is passed through `profiler.wrap`, and emits are
+#: counted with `profiler.emitted`/`profiler.skipped`
+profiler = None
+
+
+def idempotent(fn):
+    """
+    decorator for signal handlers: declares that running handler once is the same as running it several times in a
+    row, so while it's still waiting in the queue, further emits don't need to queue it again.
+
+        @signal.on(signal1, signal2)
+        @signal.idempotent
+        def rebuild_ui():
+            ...
+    """
+    fn.idempotent_handler = True
+    return fn
+
+
+def suspendable(fn):
+    """
+    decorator for signal handlers that only repaint widgets: when subscribed inside a `SuspendableScope`, handler
+    is skipped while scope is suspended and catches up on `resume()`. Handlers that keep other state in sync should
+    not be suspendable.
+
+        @signal.on(signal1, qtParent=tab)
+        @signal.suspendable
+        def update_ui():
+            ...
+    """
+    fn.suspendable_handler = True
+    return fn
+
+
+def coalescing_key(handler, args=()):
+    """
+    returns key to identify pending handler calls, or None if handler calls should not be coalesced
+    """
+    if not getattr(handler, 'idempotent_handler', False):
+        return None
+
+    key = (handler, args)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+class HandlerRegistry(Object):
+    """
+    Ordered collection of handlers with O(1) add/remove.
+
+    Bound methods can be stored as weak references: such handler does not keep its object alive, and is dropped
+    from registry once the object is garbage collected.
+    """
+
+    def __init__(self):
+        self.entries = OrderedDict()  #: key -> handler, or (weak reference to object, function) for weak handlers
+
+    @staticmethod
+    def key(handler):
+        # scoped handler is stored in place of the original, and can be removed using either of them
+        handler = getattr(handler, 'scoped_handler', handler)
+        obj = getattr(handler, '__self__', None)
+        if obj is None:
+            return handler
+        return id(obj), handler.__func__
+
+    def add(self, handler, weak=False):
+        obj = getattr(handler, '__self__', None)
+        if weak and obj is not None:
+            key = self.key(handler)
+            func = handler.__func__
+            self.entries[key] = (weakref.ref(obj, lambda _: self.entries.pop(key, None)), func)
+        else:
+            self.entries[self.key(handler)] = handler
+
+    def remove(self, handler):
+        self.entries.pop(self.key(handler), None)
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def handlers(self):
+        """
+        snapshot of live handlers, in the order they were added
+        """
+        result = []
+        for entry in list(self.entries.values()):
+            if not isinstance(entry, tuple):
+                result.append(entry)
+                continue
+
+            obj = entry[0]()
+            if obj is not None:
+                result.append(entry[1].__get__(obj, type(obj)))
+        return result
+
+
+class SuspendableScope(Object):
+    """
+    Handlers marked with `@suspendable` are bound to the scope if added to signals while scope is entered; other
+    handlers are not affected. While scope is suspended, calls to bound handlers are skipped; on `resume()`, each
+    handler that missed a call runs once, with latest arguments it missed.
+
+        scope = SuspendableScope()
+        with scope:
+            build_ui()  # @suspendable handlers subscribed here are bound to the scope
+
+        scope.suspend()  # e.g. UI is hidden
+        ...
+        scope.resume()  # UI is visible again; catch up on missed events
+    """
+
+    current = None  # type: SuspendableScope
+
+    def __init__(self):
+        self.suspended = False
+        self.missed = OrderedDict()  #: scoped handler -> latest arguments it was called with while suspended
+        self.previous = None
+
+    def __enter__(self):
+        self.previous = SuspendableScope.current
+        SuspendableScope.current = self
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        SuspendableScope.current = self.previous
+        self.previous = None
+
+    @classmethod
+    def bind_current(cls, handler):
+        """
+        returns handler, bound to current scope if there is one and handler is marked with `@suspendable`
+        """
+        if cls.current is None or not getattr(handler, 'suspendable_handler', False):
+            return handler
+        return cls.current.bind(handler)
+
+    def bind(self, handler):
+        def scoped(*args):
+            if self.suspended:
+                self.missed[scoped] = args
+                return
+            return handler(*args)
+
+        scoped.__name__ = getattr(handler, '__name__', scoped.__name__)
+        scoped.scoped_handler = handler
+        scoped.idempotent_handler = getattr(handler, 'idempotent_handler', False)
+        return scoped
+
+    def suspend(self):
+        self.suspended = True
+
+    def resume(self):
+        self.suspended = False
+        missed, self.missed = self.missed, OrderedDict()
+        for handler, args in missed.items():
+            Signal.queue.emit(partial(handler, *args), "resume", coalescing_key(handler, args))
+
+
+def weak_handler_ref(handler):
+    """
+    returns function that returns the handler, or None if handler is a bound method and its object was garbage
+    collected
+    """
+    obj = getattr(handler, '__self__', None)
+    if obj is None:
+        return lambda: handler
+
+    obj_ref, func = weakref.ref(obj), handler.__func__
+
+    def resolve():
+        live_obj = obj_ref()
+        return None if live_obj is None else func.__get__(live_obj, type(live_obj))
+
+    return resolve
+
+
+def qt_object_of(handler):
+    """
+    returns QObject that handler is bound to, if any
+    """
+    obj = getattr(handler, '__self__', None)
+    return obj if hasattr(obj, 'destroyed') else None
+
 
 class SignalQueue(Object):
     def __init__(self):
         self.max_length = 100
         self.queue = []
+        self.coalesce = True  #: skip queueing idempotent handlers that are already pending
+        self.pending_keys = set()
+
+    def emit(self, handler, source=None, key=None):
+        """
+        :param source: name of the signal/event that queued this handler, for profiling
+        :param key: coalescing key (see `coalescing_key`); handler is not queued if a call with the same key is pending
+        """
+        if key is not None and self.coalesce:
+            if key in self.pending_keys:
+                return
+            self.pending_keys.add(key)
+
+        if profiler is not None:
+            handler = profiler.wrap(handler, source, len(self.queue))
 
-    def emit(self, handler):
         if len(self.queue) > self.max_length:
             log.error("queue max length reached: emitting too many events?")
             raise Exception("queue max length reached: emitting too many events?")
 
         should_start = len(self.queue) == 0
 
-        self.queue.append(handler)
+        self.queue.append((handler, key))
         if should_start:
             self.process()
 
@@ -38,9 +244,12 @@ class SignalQueue(Object):
         queue = self.queue
 
         while current_handler < len(queue):
+            handler, key = queue[current_handler]
+            self.pending_keys.discard(key)
+
             # noinspection PyBroadException
             try:
-                queue[current_handler]()
+                handler()
             except Exception:
                 import ngSkinTools2
 
@@ -55,6 +264,7 @@ class SignalQueue(Object):
         if len(self.queue) > 50:
             log.info("handler queue finished with %d items", len(self.queue))
         self.queue = []
+        self.pending_keys.clear()
 
 
 # noinspection PyBroadException
@@ -71,7 +281,7 @@ class Signal(Object):
     3. handlers fire more signals, in turn adding more handlers to the end of the queue.
     """
 
-    all = []
+    all = weakref.WeakSet()
 
     queue = SignalQueue()
 
@@ -79,16 +289,34 @@ class Signal(Object):
         if name is None:
             raise Exception("need name for debug purposes later")
         self.name = name
-        self.handlers = []
+        self.handlers = HandlerRegistry()
         self.executing = False
         self.enabled = True
 
         self.reset()
-        Signal.all.append(self)
-        cleanup.registerCleanupHandler(self.reset)
+        Signal.all.add(self)
+        Signal.register_cleanup()
+
+    cleanup_registered = False
+
+    @classmethod
+    def register_cleanup(cls):
+        """
+        a single cleanup handler resets all live signals; signals themselves are not kept alive by cleanup
+        """
+        if cls.cleanup_registered:
+            return
+        cls.cleanup_registered = True
+        cleanup.registerCleanupHandler(cls.reset_all)
+
+    @classmethod
+    def reset_all(cls):
+        cls.cleanup_registered = False
+        for i in list(cls.all):
+            i.reset()
 
     def reset(self):
-        self.handlers = []
+        self.handlers.clear()
         self.executing = False
 
     def emit_deferred(self, *args):
@@ -109,17 +337,37 @@ class Signal(Object):
         if self.executing:
             raise Exception('Nested emit on %s detected' % self.name)
 
-        for i in self.handlers[:]:
-            Signal.queue.emit(partial(i, *args))
+        if profiler is not None:
+            profiler.emitted(self.name)
 
-    def addHandler(self, handler, qtParent=None):
+        for i in self.handlers.handlers():
+            Signal.queue.emit(partial(i, *args), self.name, coalescing_key(i, args))
+
+    def addHandler(self, handler, qtParent=None, weak=False):
+        """
+        :param qtParent: handler is removed when this QObject is destroyed; for handlers that are methods of a
+            QObject, that object is used by default.
+        :param weak: for bound method handlers, don't keep the object alive; handler is removed when object is
+            garbage collected.
+        """
         if hasattr(handler, 'emit'):
             handler = handler.emit
 
-        self.handlers.append(handler)
+        if not weak:
+            handler = SuspendableScope.bind_current(handler)
+
+        self.handlers.add(handler, weak=weak)
+
+        # for weak handlers, closure must not keep handler's object alive either
+        handler_ref = weak_handler_ref(handler) if weak else lambda: handler
 
         def remove():
-            return self.removeHandler(handler)
+            live_handler = handler_ref()
+            if live_handler is not None:
+                self.removeHandler(live_handler)
+
+        if qtParent is None:
+            qtParent = qt_object_of(getattr(handler, 'scoped_handler', handler))
 
         if qtParent is not None:
             qtParent.destroyed.connect(remove)
@@ -127,11 +375,7 @@ class Signal(Object):
         return remove
 
     def removeHandler(self, handler):
-        try:
-            self.handlers.remove(handler)
-        except ValueError:
-            # not found in list? no biggie.
-            pass
+        self.handlers.remove(handler)
 
 
 def on(*signals, **kwargs):
@@ -208,23 +452,26 @@ class SignalHub(Object):
         :param Callable handler: callback which will be called when event is emitted
         :return: unsubscribe function: call it to terminate this subscription
         """
-        self.handlers.setdefault(event, []).append(handler)
+        registry = self.handlers.get(event, None)
+        if registry is None:
+            registry = self.handlers[event] = HandlerRegistry()
+        handler = SuspendableScope.bind_current(handler)
+        registry.add(handler)
 
         def unsubscribe():
-            try:
-                self.handlers[event].remove(handler)
-            except ValueError:
-                # not found in list? no biggie.
-                pass
+            registry.remove(handler)
 
         return unsubscribe
 
     def emit(self, event):
+        if profiler is not None:
+            profiler.emitted(event.name)
+
         if not event in self.handlers:
             return
 
-        for i in self.handlers[event]:
-            self.queue.emit(i)
+        for i in self.handlers[event].handlers():
+            self.queue.emit(i, event.name, coalescing_key(i))
 
     def on(self, events, scope=None):
         """
@@ -0,0 +1,214 @@
+"""
+Opt-in instrumentation of signal handling: which signals are emitted how often (and how often an emit was skipped as
+unchanged or coalesced), how long each handler takes, how deep the handler queue gets, and which handler emits were
+caused by which.
+
+    from ngSkinTools2 import signal_profiler
+
+    signal_profiler.start()
+    ... # interact with UI
+    profiler = signal_profiler.stop()
+    print(profiler.report())
+    profiler.save_chrome_trace("/tmp/signals.json")  # open in chrome://tracing or ui.perfetto.dev
+
+When profiling is not started, the only cost in signal code is a single `is None` check per emit and per queued
+handler.
+"""
+import json
+import time
+from functools import partial
+
+from ngSkinTools2 import signal
+from ngSkinTools2.api.python_compatibility import Object
+
+
+def handler_name(handler):
+    while isinstance(handler, partial) or hasattr(handler, 'scoped_handler'):
+        handler = handler.func if isinstance(handler, partial) else handler.scoped_handler
+
+    name = getattr(handler, '__qualname__', None) or getattr(handler, '__name__', None) or repr(handler)
+    module = getattr(handler, '__module__', None)
+    return name if module is None else module + "." + name
+
+
+class HandlerRecord(Object):
+    """
+    single queued handler execution
+    """
+
+    def __init__(self, record_id, parent_id, signal_name, name, queue_depth):
+        self.id = record_id
+        self.parent_id = parent_id  #: record of the handler that emitted the signal; None for root emits
+        self.signal_name = signal_name
+        self.name = name
+        self.queue_depth = queue_depth
+        self.start = None
+        self.duration = None
+        self.error = None
+
+
+class SignalProfiler(Object):
+    def __init__(self):
+        self.records = []  # type: list[HandlerRecord]
+        self.emits = {}  #: signal name -> number of emits
+        self.skips = {}  #: signal name -> number of emit requests skipped by ConditionalEmit/CoalescedEmit
+        self.current = None
+        self.started = time.time()
+
+    def emitted(self, signal_name):
+        """
+        called by signals when emitted, regardless of how many handlers they have
+        """
+        self.emits[signal_name] = self.emits.get(signal_name, 0) + 1
+
+    def skipped(self, signal_name):
+        """
+        called when an emit is not done because nothing changed, or because it was coalesced with a pending one
+        """
+        self.skips[signal_name] = self.skips.get(signal_name, 0) + 1
+
+    def wrap(self, handler, signal_name, queue_depth):
+        """
+        called by signal queue when handler is queued; returns a replacement handler that records execution
+        """
+        record = HandlerRecord(len(self.records), self.current, signal_name, handler_name(handler), queue_depth)
+        self.records.append(record)
+
+        def execute():
+            previous = self.current
+            self.current = record.id
+            record.start = time.time()
+            try:
+                return handler()
+            except Exception as err:
+                record.error = str(err)
+                raise
+            finally:
+                record.duration = time.time() - record.start
+                self.current = previous
+
+        return execute
+
+    def executed(self):
+        return [r for r in self.records if r.duration is not None]
+
+    def emit_counts(self):
+        """
+        :return: signal name -> number of emits
+        """
+        return dict(self.emits)
+
+    def handler_call_counts(self):
+        """
+        :return: signal name -> number of handler calls queued by it; emit to N handlers counts as N
+        """
+        result = {}
+        for r in self.records:
+            result[r.signal_name] = result.get(r.signal_name, 0) + 1
+        return result
+
+    def handler_stats(self):
+        """
+        :return: list of (handler name, calls, total seconds, max seconds, errors), slowest total first
+        """
+        stats = {}
+        for r in self.executed():
+            s = stats.setdefault(r.name, [r.name, 0, 0.0, 0.0, 0])
+            s[1] += 1
+            s[2] += r.duration
+            s[3] = max(s[3], r.duration)
+            s[4] += 1 if r.error is not None else 0
+        return sorted((tuple(s) for s in stats.values()), key=lambda s: -s[2])
+
+    def max_queue_depth(self):
+        return max([r.queue_depth for r in self.records] or [0])
+
+    def cascade(self, root):
+        """
+        total time of the root handler and all handlers caused by it
+
+        :type root: HandlerRecord
+        """
+        children = {}
+        for r in self.executed():
+            children.setdefault(r.parent_id, []).append(r)
+
+        def total(record):
+            return record.duration + sum(total(c) for c in children.get(record.id, []))
+
+        def lines(record, indent):
+            yield "{0}{1:8.2f}ms {2} <- {3}".format("  " * indent, record.duration * 1000, record.name, record.signal_name)
+            for c in children.get(record.id, []):
+                for line in lines(c, indent + 1):
+                    yield line
+
+        return total(root), list(lines(root, 0))
+
+    def report(self, top=15):
+        result = ["signal profile: {0} handlers executed, max queue depth {1}".format(len(self.executed()), self.max_queue_depth())]
+
+        result.append("")
+        result.append("emits per signal (emits, skipped emits, handler calls):")
+        handler_calls = self.handler_call_counts()
+        names = set(self.emits) | set(self.skips)
+        for name in sorted(names, key=lambda n: (-self.emits.get(n, 0), -self.skips.get(n, 0)))[:top]:
+            result.append("  {0:6d} {1:6d} {2:6d} {3}".format(self.emits.get(name, 0), self.skips.get(name, 0), handler_calls.get(name, 0), name))
+
+        result.append("")
+        result.append("slowest handlers (calls, total ms, max ms, errors):")
+        for name, calls, total, maximum, errors in self.handler_stats()[:top]:
+            result.append("  {0:6d} {1:10.2f} {2:10.2f} {3:4d} {4}".format(calls, total * 1000, maximum * 1000, errors, name))
+
+        roots = [r for r in self.executed() if r.parent_id is None]
+        cascades = sorted((self.cascade(r) for r in roots), key=lambda c: -c[0])[:3]
+        for total, lines in cascades:
+            result.append("")
+            result.append("cascade, {0:.2f}ms total:".format(total * 1000))
+            result.extend("  " + line for line in lines)
+
+        return "\n".join(result)
+
+    def chrome_trace(self):
+        """
+        :return: trace in Chrome "Trace Event" format
+        """
+        events = []
+        for r in self.executed():
+            events.append(
+                {
+                    "name": r.name,
+                    "cat": r.signal_name or "signal",
+                    "ph": "X",
+                    "ts": (r.start - self.started) * 1e6,
+                    "dur": r.duration * 1e6,
+                    "pid": 1,
+                    "tid": 1,
+                    "args": {"id": r.id, "parent": r.parent_id, "queueDepth": r.queue_depth, "error": r.error},
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save_chrome_trace(self, file):
+        with open(file, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+
+
+def start():
+    """
+    start recording signal handling; previous recording, if any, is discarded.
+
+    :rtype: SignalProfiler
+    """
+    signal.profiler = SignalProfiler()
+    return signal.profiler
+
+
+def stop():
+    """
+    stop recording and return recorded profile
+
+    :rtype: SignalProfiler
+    """
+    result = signal.profiler
+    signal.profiler = None
+    return result
@@ -42,7 +42,7 @@ def build_action_delete_custom_nodes_for_selection(parent, session):
         callback=lambda: removeLayerData.remove_custom_nodes_from_selection(interactive=True, session=session),
     )
 
-    @signal.on(session.events.nodeSelectionChanged)
+    @signal.on(session.events.nodeSelectionChanged, qtParent=parent)
     def update():
         result.setEnabled(bool(session.state.selection))
 
@@ -73,6 +73,7 @@ class Actions(Object):
         #ILM
         self.ilm_importJointList = ilm_importFromJson_actions.ilm_importJointList(parent)
         self.ilm_bindSkinAndImportLayer = ilm_importFromJson_actions.ilm_bindSkinAndImportLayer(parent)
+        self.ilm_bindSkinAndImportLayerBatch = ilm_importFromJson_actions.ilm_bindSkinAndImportLayerBatch(parent)
 
 
         self.addLayer = layers.buildAction_createLayer(session, parent)
@@ -1,6 +1,6 @@
 import re
+from collections import OrderedDict, namedtuple
 
-from maya import cmds
 from PySide2 import QtCore, QtGui, QtWidgets
 
 from ngSkinTools2 import signal
@@ -27,28 +27,105 @@ class InfluenceNameFilter(Object):
     "R_arm", but does not match "spine"
 
     in a  special case of empty filter, returns true for isMatch
+
+    For filtering whole lists, use `matching_names`: it keeps an index of lowercase short names for the last seen
+    list, caches matches per token and per filter string, and when a token is extended while typing, only searches
+    among matches of the shorter token.
     """
 
+    max_cached_tokens = 200
+    max_cached_filters = 50
+
     def __init__(self):
         self.matchers = []
+        self.expressions = ()
         self.changed = Signal("filter changed")
         self.currentFilterString = ""
 
+        self.indexed_names = None  # names that index was built for
+        self.index = []  # (name, lowercase short name)
+        self.token_matches = {}  # expression -> index entries matching it
+        self.filter_matches = OrderedDict()  # expressions -> set of matching names
+
+    @staticmethod
+    def expression(token):
+        expression = "".join([char for char in token if char.lower() in "abcdefghijklmnopqrstuvwxyz0123456789_*"])
+        return expression.replace("*", ".*")
+
     def set_filter_string(self, filterString):
         if self.currentFilterString == filterString:
             # avoid emitting change events if there's no change
             return
         self.currentFilterString = filterString
 
-        def createPattern(expression):
-            expression = "".join([char for char in expression if char.lower() in "abcdefghijklmnopqrstuvwxyz0123456789_*"])
-            expression = expression.replace("*", ".*")
-            return re.compile(expression, re.I)
+        expressions = tuple(self.expression(i) for i in filterString.split())
+        if expressions == self.expressions:
+            # e.g. trailing space or ignored characters typed: matches stay the same
+            return self
 
-        self.matchers = [createPattern(i.strip()) for i in filterString.split() if i.strip() != '']
+        self.expressions = expressions
+        self.matchers = [re.compile(i, re.I) for i in expressions]
         self.changed.emit()
         return self
 
+    def index_names(self, names):
+        names = tuple(names)
+        if names == self.indexed_names:
+            return
+
+        self.indexed_names = names
+        self.index = [(name, self.short_name(str(name).lower())) for name in names]
+        self.token_matches = {}
+        self.filter_matches.clear()
+
+    def token_match(self, expression):
+        """
+        :return: index entries, matching single filter expression
+        """
+        result = self.token_matches.get(expression, None)
+        if result is not None:
+            return result
+
+        # matches of "leg" are a subset of matches of "le": search only among matches of the longest cached prefix
+        candidates = self.index
+        prefix = None
+        for cached in self.token_matches:
+            if expression.startswith(cached) and (prefix is None or len(cached) > len(prefix)):
+                prefix = cached
+        if prefix is not None:
+            candidates = self.token_matches[prefix]
+
+        pattern = re.compile(expression, re.I)
+        result = [entry for entry in candidates if pattern.search(entry[1]) is not None]
+
+        if len(self.token_matches) >= self.max_cached_tokens:
+            self.token_matches = {}
+        self.token_matches[expression] = result
+        return result
+
+    def matching_names(self, names):
+        """
+        filter a list of names with current filter string.
+
+        :type names: list[str]
+        :return: set of names that match the filter
+        """
+        self.index_names(names)
+        if not self.expressions:
+            return set(self.indexed_names)
+
+        result = self.filter_matches.get(self.expressions, None)
+        if result is None:
+            result = set()
+            for expression in self.expressions:
+                result.update(name for name, _ in self.token_match(expression))
+
+            self.filter_matches[self.expressions] = result
+            while len(self.filter_matches) > self.max_cached_filters:
+                self.filter_matches.popitem(last=False)
+
+        return result
+
     def short_name(self, name):
         try:
             return name[name.rindex("|") + 1 :]
@@ -90,139 +167,281 @@ def build_used_influences_action(parent):
     return result
 
 
-def build_view(parent, actions, session, filter):
+def shorten_influence_names(paths):
     """
-    :param parent: ui parent
-    :type actions: ngSkinTools2.ui.actions.Actions
-    :type session: ngSkinTools2.ui.session.Session
-    :type filter: InfluenceNameFilter
+    shortest unique names for a list of DAG paths, resolved in one batch; paths that are not found in the scene or
+    are not DAG nodes are returned as is.
+
+    :type paths: list[str]
+    :rtype: list[str]
     """
+    from maya.api import OpenMaya as om
+
+    # MSelectionList merges items that are already in the list, so each path's index is tracked by checking list
+    # length after adding it
+    selection = om.MSelectionList()
+    indexes = {}  #: path -> index in selection list; None if path was not found or merged with another item
+    for path in paths:
+        if path in indexes:
+            continue
+        length = selection.length()
+        try:
+            selection.add(path)
+        except RuntimeError:
+            indexes[path] = None
+            continue
+        indexes[path] = length if selection.length() > length else None
+
+    result = []
+    for path in paths:
+        index = indexes[path]
+        if index is None:
+            result.append(path)
+            continue
+        try:
+            result.append(selection.getDagPath(index).partialPathName())
+        except RuntimeError:
+            result.append(path)
+    return result
 
-    from ngSkinTools2.ui.options import config
 
-    icon_joint = QtGui.QIcon(":/joint.svg")
-    icon_joint_disabled = qt.image_icon("joint_disabled.png")
-    icon_transform = QtGui.QIcon(":/cube.png")
-    icon_transform_disabled = qt.image_icon("cube_disabled.png")
-    icon_mask = QtGui.QIcon(":/blendColors.svg")
-    icon_dq = QtGui.QIcon(":/rotate_M.png")
+class InfluenceNamesCache(Object):
+    """
+    remembers shortened names for the last seen list of influence paths, so that refreshes that do not change the
+    influences list (paint target changes, filter edits, lock toggles) don't need to query the scene.
+    """
 
-    icon_locked = QtGui.QIcon(":/Lock_ON.png")
-    icon_unlocked = QtGui.QIcon(":/Lock_OFF_grey.png")
+    def __init__(self):
+        self.paths = None
+        self.names = {}
+
+    def get(self, paths):
+        """
+        :rtype: dict[str, str]
+        """
+        paths = tuple(paths)
+        if paths != self.paths:
+            self.paths = paths
+            self.names = dict(zip(paths, shorten_influence_names(list(paths))))
+        return self.names
+
+    def clear(self):
+        self.paths = None
+        self.names = {}
+
+
+#: single row in influences view; `icon` is an icon key, `locked` is None for rows without lock toggle
+InfluenceRow = namedtuple("InfluenceRow", ["id", "label", "icon", "locked"])
+
+
+class InfluencesModel(QtCore.QAbstractTableModel):
+    """
+    flat list of influence rows; column 0 is influence name, column 1 is lock toggle, painted by `LockIconDelegate`.
+
+    Qt only queries data for visible rows; `set_rows` updates the model incrementally, so that selection and scroll
+    position survive refreshes and unchanged rows are not repainted.
+    """
 
     id_role = QtCore.Qt.UserRole + 1
-    item_size_hint = QtCore.QSize(25 * scale_multiplier, 25 * scale_multiplier)
+    locked_role = QtCore.Qt.UserRole + 2
+
+    def __init__(self, icons, parent=None):
+        """
+        :param dict icons: icon key -> QIcon
+        """
+        QtCore.QAbstractTableModel.__init__(self, parent)
+        self.icons = icons
+        self.rows = []  # type: list[InfluenceRow]
+        self.row_by_id = {}
+        self.item_size_hint = QtCore.QSize(25 * scale_multiplier, 25 * scale_multiplier)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 2
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return "Influences" if section == 0 else ""
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
 
-    def get_item_id(item):
-        if item is None:
+        row = self.rows[index.row()]
+        if role == self.id_role:
+            return row.id
+        if role == self.locked_role:
+            return row.locked
+        if role == QtCore.Qt.SizeHintRole:
+            return self.item_size_hint
+        if index.column() != 0:
             return None
-        return item.data(0, id_role)
+        if role == QtCore.Qt.DisplayRole:
+            return row.label
+        if role == QtCore.Qt.DecorationRole:
+            return self.icons[row.icon]
+        return None
+
+    def row_of(self, item_id):
+        """
+        :return: row number for the given influence id, or None
+        """
+        return self.row_by_id.get(item_id, None)
+
+    def set_rows(self, rows):
+        """
+        replace model contents; rows that keep their id are updated in place, and only the range that differs
+        between old and new id lists is removed/inserted.
+
+        :type rows: list[InfluenceRow]
+        """
+        old_ids = [r.id for r in self.rows]
+        new_ids = [r.id for r in rows]
+
+        prefix = 0
+        max_prefix = min(len(old_ids), len(new_ids))
+        while prefix < max_prefix and old_ids[prefix] == new_ids[prefix]:
+            prefix += 1
+
+        suffix = 0
+        max_suffix = max_prefix - prefix
+        while suffix < max_suffix and old_ids[-1 - suffix] == new_ids[-1 - suffix]:
+            suffix += 1
+
+        old_end = len(old_ids) - suffix
+        new_end = len(new_ids) - suffix
+
+        if old_end > prefix:
+            self.beginRemoveRows(QtCore.QModelIndex(), prefix, old_end - 1)
+            del self.rows[prefix:old_end]
+            self.endRemoveRows()
+
+        if new_end > prefix:
+            self.beginInsertRows(QtCore.QModelIndex(), prefix, new_end - 1)
+            self.rows[prefix:prefix] = rows[prefix:new_end]
+            self.endInsertRows()
+
+        changed = [i for i in range(len(rows)) if self.rows[i] != rows[i]]
+        self.rows = list(rows)
+        self.row_by_id = dict((r.id, index) for index, r in enumerate(rows))
+        if changed:
+            self.dataChanged.emit(self.index(changed[0], 0), self.index(changed[-1], 1))
+
+
+class LockIconDelegate(QtWidgets.QStyledItemDelegate):
+    """
+    paints lock state icon for lock column; clicks are handled by `InfluencesTreeView`
+    """
 
-    tree_items = {}
+    def __init__(self, icon_locked, icon_unlocked, parent=None):
+        QtWidgets.QStyledItemDelegate.__init__(self, parent)
+        self.icon_locked = icon_locked
+        self.icon_unlocked = icon_unlocked
+        self.icon_size = 13 * scale_multiplier
 
-    def shorten_infl_name(name):
-        try:
-            return cmds.ls(name)[0]
-        except:
-            return name
+    def paint(self, painter, option, index):
+        QtWidgets.QStyledItemDelegate.paint(self, painter, option, index)
 
-    def build_items(view, items, layer):
-        # type: (QtWidgets.QTreeWidget, list[InfluenceInfo], Layer) -> None
-        is_group_layer = layer is not None and layer.num_children != 0
+        locked = index.data(InfluencesModel.locked_role)
+        if locked is None:
+            return
 
-        def get_icon(influence, is_joint):
-            if influence.used:
-                return icon_joint if is_joint else icon_transform
-            return icon_joint_disabled if is_joint else icon_transform_disabled
+        icon = self.icon_locked if locked else self.icon_unlocked
+        rect = QtCore.QRect(0, 0, self.icon_size, self.icon_size)
+        rect.moveCenter(option.rect.center())
+        icon.paint(painter, rect)
 
-        def rebuild_buttons(item, item_id, buttons):
-            bar = QtWidgets.QToolBar(parent=parent)
-            bar.setMovable(False)
-            bar.setIconSize(QtCore.QSize(13 * scale_multiplier, 13 * scale_multiplier))
 
-            if "unlocked" in buttons:
-                a = bar.addAction(icon_unlocked, "Toggle locked/unlocked")
+class InfluencesTreeView(QtWidgets.QTreeView):
+    """
+    tree view that reports clicks on lock column instead of changing selection
+    """
 
-                @qt.on(a.triggered)
-                def handler():
-                    layer.locked_influences = layer.locked_influences + [item_id]
-                    log.info("updated to %r", layer.locked_influences)
-                    session.events.influencesListUpdated.emit()
+    def __init__(self, parent=None):
+        QtWidgets.QTreeView.__init__(self, parent)
+        self.lock_clicked = Signal("lock clicked")
 
-            if "locked" in buttons:
-                a = bar.addAction(icon_locked, "Toggle locked/unlocked")
+    def mousePressEvent(self, event):
+        index = self.indexAt(event.pos())
+        if index.isValid() and index.column() == 1 and event.button() == QtCore.Qt.LeftButton:
+            locked = index.data(InfluencesModel.locked_role)
+            if locked is not None:
+                self.lock_clicked.emit(index.data(InfluencesModel.id_role), locked)
+                return
 
-                @qt.on(a.triggered)
-                def handler():
-                    layer.locked_influences = [i for i in layer.locked_influences if i != item_id]
-                    log.info("updated to %r", layer.locked_influences)
-                    session.events.influencesListUpdated.emit()
+        QtWidgets.QTreeView.mousePressEvent(self, event)
 
-            view.setItemWidget(item, 1, bar)
 
-        def wanted_tree_items(items):
-            if layer is None:
-                return
+def build_view(parent, actions, session, filter):
+    """
+    :param parent: ui parent
+    :type actions: ngSkinTools2.ui.actions.Actions
+    :type session: ngSkinTools2.ui.session.Session
+    :type filter: InfluenceNameFilter
+    """
 
-            # calculate "used" regardless as we're displaying it visually even if "show used influences only" is toggled off
-            used = set((layer.get_used_influences() or []))
-            locked = set((layer.locked_influences or []))
-            log.info("locked influences: %r", locked)
-            for i in items:
-                i.used = i.logicalIndex in used
-                i.locked = i.logicalIndex in locked
+    from ngSkinTools2.ui.options import config
 
-            if config.influences_show_used_influences_only() and layer is not None:
-                items = [i for i in items if i.used]
+    icons = {
+        "joint": QtGui.QIcon(":/joint.svg"),
+        "joint_disabled": qt.image_icon("joint_disabled.png"),
+        "transform": QtGui.QIcon(":/cube.png"),
+        "transform_disabled": qt.image_icon("cube_disabled.png"),
+        "mask": QtGui.QIcon(":/blendColors.svg"),
+        "dq": QtGui.QIcon(":/rotate_M.png"),
+    }
 
-            if is_group_layer:
-                items = []
+    icon_locked = QtGui.QIcon(":/Lock_ON.png")
+    icon_unlocked = QtGui.QIcon(":/Lock_OFF_grey.png")
 
-            yield "mask", "[Mask]", icon_mask, []
-            if not is_group_layer and session.state.skin_cluster_dq_channel_used:
-                yield "dq", "[DQ Weights]", icon_dq, []
+    names_cache = InfluenceNamesCache()
+    updating_selection = qt.updateGuard()
 
-            for i in items:
-                is_joint = i.path is not None
-                infl_label = shorten_infl_name(i.path) if is_joint else i.name
-                if filter.is_match(infl_label):
-                    yield i.logicalIndex, infl_label, get_icon(i, is_joint), ["locked" if i.locked else "unlocked"]
+    def wanted_rows(items, layer):
+        # type: (list[InfluenceInfo], Layer) -> list[InfluenceRow]
+        if layer is None:
+            return []
 
-        selected_ids = []
-        if session.state.currentLayer.layer:
-            selected_ids = session.state.currentLayer.layer.paint_targets
-        current_id = None if not selected_ids else selected_ids[0]
+        is_group_layer = layer.num_children != 0
 
-        with qt.signals_blocked(view):
-            tree_items.clear()
-            tree_root = view.invisibleRootItem()
+        # calculate "used" regardless as we're displaying it visually even if "show used influences only" is toggled off
+        used = set((layer.get_used_influences() or []))
+        locked = set((layer.locked_influences or []))
 
-            item_index = 0
-            for item_id, displayName, icon, buttons in wanted_tree_items(items):
-                if item_index >= tree_root.childCount():
-                    item = QtWidgets.QTreeWidgetItem([displayName])
-                else:
-                    item = tree_root.child(item_index)
-                    item.setText(0, displayName)
+        result = [InfluenceRow("mask", "[Mask]", "mask", None)]
+        if not is_group_layer and session.state.skin_cluster_dq_channel_used:
+            result.append(InfluenceRow("dq", "[DQ Weights]", "dq", None))
 
-                item.setData(0, id_role, item_id)
-                item.setIcon(0, icon)
-                item.setSizeHint(0, item_size_hint)
-                tree_root.addChild(item)
+        if is_group_layer:
+            return result
 
-                tree_items[item_id] = item
-                if item_id == current_id:
-                    view.setCurrentItem(item, 0, QtCore.QItemSelectionModel.NoUpdate)
-                item.setSelected(item_id in selected_ids)
+        # labels and filter matches are computed for all influences, so that filter index stays the same when
+        # switching layers or toggling "used influences only"
+        short_names = names_cache.get([i.path for i in items if i.path is not None])
+        labels = [short_names[i.path] if i.path is not None else i.name for i in items]
+        matching = filter.matching_names(labels)
 
-                rebuild_buttons(item, item_id, buttons)
+        show_used_only = config.influences_show_used_influences_only()
+        for i, infl_label in zip(items, labels):
+            is_joint = i.path is not None
+            if infl_label not in matching or (show_used_only and i.logicalIndex not in used):
+                continue
 
-                item_index += 1
+            icon = "joint" if is_joint else "transform"
+            if i.logicalIndex not in used:
+                icon += "_disabled"
+            result.append(InfluenceRow(i.logicalIndex, infl_label, icon, i.logicalIndex in locked))
 
-            while item_index < tree_root.childCount():
-                tree_root.removeChild(tree_root.child(item_index))
+        return result
 
-    view = QtWidgets.QTreeWidget(parent)
+    view = InfluencesTreeView(parent)
+    model = InfluencesModel(icons, parent=view)
+    view.setModel(model)
+    view.setItemDelegateForColumn(1, LockIconDelegate(icon_locked, icon_unlocked, parent=view))
+    view.setRootIsDecorated(False)
     view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
     view.setUniformRowHeights(True)
     view.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
@@ -234,26 +453,80 @@ def build_view(parent, actions, session, filter):
     view.header().setStretchLastSection(False)
     view.header().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
 
-    view.setHeaderLabels(["Influences", ""])
     view.header().setSectionResizeMode(1, QtWidgets.QHeaderView.Fixed)
     view.setColumnWidth(1, 25 * scale_multiplier)
 
-    # view.setHeaderHidden(True)
+    def get_item_id(index):
+        if index is None or not index.isValid():
+            return None
+        return index.data(InfluencesModel.id_role)
+
+    def select_ids(selected_ids):
+        """
+        update view selection to match given ids, without syncing it back to paint targets
+        """
+        selection = QtCore.QItemSelection()
+        for item_id in selected_ids:
+            row = model.row_of(item_id)
+            if row is not None:
+                selection.select(model.index(row, 0), model.index(row, 1))
+
+        with updating_selection:
+            selection_model = view.selectionModel()
+            current_row = None if not selected_ids else model.row_of(selected_ids[0])
+            if current_row is not None:
+                selection_model.setCurrentIndex(model.index(current_row, 0), QtCore.QItemSelectionModel.NoUpdate)
+            selection_model.select(selection, QtCore.QItemSelectionModel.ClearAndSelect)
+
+    displayed_influences = []
+
+    def build_items(items, layer):
+        # type: (list[InfluenceInfo], Layer) -> None
+        displayed_influences[:] = items
+        with updating_selection:
+            model.set_rows(wanted_rows(items, layer))
+
+        select_ids([] if layer is None else layer.paint_targets)
+
+    @signal.on(view.lock_clicked, qtParent=view)
+    def toggle_locked(item_id, locked):
+        layer = session.state.currentLayer.layer
+        if layer is None:
+            return
+
+        if locked:
+            layer.locked_influences = [i for i in layer.locked_influences if i != item_id]
+        else:
+            layer.locked_influences = layer.locked_influences + [item_id]
+        log.info("updated to %r", layer.locked_influences)
+        session.events.influencesListUpdated.emit()
+
     def refresh_items():
-        build_items(view, list_influences(session.state.currentLayer.selectedSkinCluster), session.state.currentLayer.layer)
+        build_items(list_influences(session.state.currentLayer.selectedSkinCluster), session.state.currentLayer.layer)
 
-    @signal.on(filter.changed, config.influences_show_used_influences_only.changed, session.events.influencesListUpdated)
+    @signal.on(session.events.targetChanged, qtParent=view)
+    def target_changed():
+        names_cache.clear()
+
+    @signal.on(config.influences_show_used_influences_only.changed, session.events.influencesListUpdated, qtParent=view)
+    @signal.idempotent
     def filter_changed():
         refresh_items()
 
+    @signal.on(filter.changed, qtParent=view)
+    @signal.idempotent
+    def filter_text_changed():
+        # influences did not change, only which of them are displayed
+        build_items(list(displayed_influences), session.state.currentLayer.layer)
+
     @signal.on(session.events.currentLayerChanged, qtParent=view)
+    @signal.idempotent
     def current_layer_changed():
         if not session.state.currentLayer.layer:
-            build_items(view, [], None)
+            build_items([], None)
         else:
             log.info("current layer changed to %s", session.state.currentLayer.layer)
             refresh_items()
-            current_influence_changed()
 
     @signal.on(session.events.currentInfluenceChanged, qtParent=view)
     def current_influence_changed():
@@ -261,19 +534,11 @@ def build_view(parent, actions, session, filter):
             return
 
         log.info("current influence changed - updating item selection")
-        with qt.signals_blocked(view):
-            targets = session.state.currentLayer.layer.paint_targets
-            first = True
-            for tree_item in tree_items.values():
-                selected = get_item_id(tree_item) in targets
-                if selected and first:
-                    view.setCurrentItem(tree_item, 0, QtCore.QItemSelectionModel.NoUpdate)
-                first = False
-                tree_item.setSelected(selected)
-
-    @qt.on(view.currentItemChanged)
+        select_ids(session.state.currentLayer.layer.paint_targets)
+
+    @qt.on(view.selectionModel().currentChanged)
     def current_item_changed(curr, prev):
-        if curr is None:
+        if updating_selection.updating or not curr.isValid():
             return
 
         if session.state.selectedSkinCluster is None:
@@ -285,16 +550,20 @@ def build_view(parent, actions, session, filter):
         log.info("focused item changed: %r", get_item_id(curr))
         sync_paint_targets_to_selection()
 
-    @qt.on(view.itemSelectionChanged)
-    def sync_paint_targets_to_selection():
+    @qt.on(view.selectionModel().selectionChanged)
+    def sync_paint_targets_to_selection(*_):
+        if updating_selection.updating:
+            return
+
         log.info("syncing paint targets")
-        selected_ids = [get_item_id(item) for item in view.selectedItems()]
+        selection_model = view.selectionModel()
+        selected_ids = [get_item_id(index) for index in selection_model.selectedRows(0)]
         selected_ids = [i for i in selected_ids if i is not None]
 
-        current_item = view.currentItem()
-        if current_item and current_item.isSelected():
+        current = selection_model.currentIndex()
+        if current.isValid() and selection_model.isRowSelected(current.row(), QtCore.QModelIndex()):
             # move id of current item to front, if it's selected
-            item_id = get_item_id(current_item)
+            item_id = get_item_id(current)
             selected_ids.remove(item_id)
             selected_ids = [item_id] + selected_ids
 
@@ -1,9 +1,15 @@
+import json
+
+from maya import cmds
 from PySide2 import QtCore, QtWidgets
 
 from ngSkinTools2 import api, signal
 from ngSkinTools2.api import python_compatibility
 from ngSkinTools2.api.log import getLogger
+from ngSkinTools2.api.python_compatibility import Object
 from ngSkinTools2.api.session import session
+from ngSkinTools2.decorators import Undo
+from ngSkinTools2.signal import Signal
 from ngSkinTools2.ui import qt
 from ngSkinTools2.ui.layout import scale_multiplier
 
@@ -14,61 +20,361 @@ if python_compatibility.PY3:
 log = getLogger("layersView")
 
 
-def build_view(parent, actions):
-    from ngSkinTools2.operations import layers
+class LayerNode(Object):
+    def __init__(self, layer, parent):
+        """
+        :type layer: api.Layer
+        :type parent: LayerNode
+        """
+        self.layer = layer  # None for root node
+        self.parent = parent
+        self.children = []  # type: list[LayerNode] # in display order (topmost layer first)
+        self.row_in_parent = 0  # kept up to date by the model whenever parent's children list changes
+        # (name, enabled) as last displayed; layer objects are edited in place, so changes are detected against this
+        self.displayed = None
+        if layer is not None:
+            self.sync()
+
+    def sync(self):
+        """
+        remembers displayed state of the layer; returns True if it changed since last sync
+        """
+        displayed, self.displayed = self.displayed, (self.layer.name, self.layer.enabled)
+        return displayed != self.displayed
 
-    layer_icon_size = 20
-    visibility_icon_size = 13
+    @property
+    def id(self):
+        return None if self.layer is None else self.layer.id
 
-    icon_layer = qt.scaled_icon(":/layeredTexture.svg", layer_icon_size, layer_icon_size)
-    icon_layer_disabled = qt.scaled_icon(":/layerEditor.png", layer_icon_size, layer_icon_size)
-    icon_visible = qt.scaled_icon("eye-fill.svg", visibility_icon_size, visibility_icon_size)
-    icon_hidden = qt.scaled_icon("eye-slash-fill.svg", visibility_icon_size, visibility_icon_size)
+    def row(self):
+        return self.row_in_parent
+
+    def is_ancestor_of(self, node):
+        while node is not None:
+            if node is self:
+                return True
+            node = node.parent
+        return False
+
+
+class LayersModel(QtCore.QAbstractItemModel):
+    """
+    layers tree; column 0 is layer name, column 1 is visibility toggle, painted by `VisibilityIconDelegate`.
+
+    `set_layers` updates the tree by layer ids: rows of removed or re-parented layers are removed, new layers are
+    inserted, reordered siblings are moved, and rows of layers that changed name or visibility get `dataChanged`;
+    untouched rows keep their selection and are not repainted.
+    """
 
-    layer_data_role = QtCore.Qt.UserRole + 1
+    layer_role = QtCore.Qt.UserRole + 1
+    enabled_role = QtCore.Qt.UserRole + 2
+    mime_type = "application/x-ngskintools2-layer-ids"
 
-    def item_to_layer(item):
-        # type: (QtWidgets.QTreeWidgetItem) -> Union[api.Layer, None]
-        if item is None:
+    def __init__(self, icon_layer, icon_layer_disabled, parent=None):
+        QtCore.QAbstractItemModel.__init__(self, parent)
+        self.icon_layer = icon_layer
+        self.icon_layer_disabled = icon_layer_disabled
+        self.root = LayerNode(None, None)
+        self.nodes = {}  # type: dict[int, LayerNode]
+        self.visibility_size_hint = QtCore.QSize(1 * scale_multiplier, 25 * scale_multiplier)
+
+        self.layer_renamed = Signal("layer renamed")  # (layer, new name)
+        self.layers_dropped = Signal("layers dropped")  # (layer ids, new parent id, row in parent or -1)
+
+    def node_of(self, index):
+        """
+        :rtype: LayerNode
+        """
+        if not index.isValid():
+            return self.root
+        return index.internalPointer()
+
+    def index_of(self, node, column=0):
+        if node is self.root:
+            return QtCore.QModelIndex()
+        return self.createIndex(node.row(), column, node)
+
+    def index_of_layer(self, layer_id):
+        node = self.nodes.get(layer_id, None)
+        if node is None:
+            return QtCore.QModelIndex()
+        return self.index_of(node)
+
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        node = self.node_of(parent)
+        if row < 0 or row >= len(node.children) or column < 0 or column > 1:
+            return QtCore.QModelIndex()
+        return self.createIndex(row, column, node.children[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        return self.index_of(index.internalPointer().parent)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self.node_of(parent).children)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 2
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return "Layers" if section == 0 else ""
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
             return None
-        return item.data(0, layer_data_role)
 
-    # noinspection PyShadowingNames
-    def sync_layer_parents_to_widget_items(view):
+        layer = index.internalPointer().layer
+        if role == self.layer_role:
+            return layer
+
+        if index.column() == 1:
+            if role == self.enabled_role:
+                return layer.enabled
+            if role == QtCore.Qt.SizeHintRole:
+                return self.visibility_size_hint
+            return None
+
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            return layer.name
+        if role == QtCore.Qt.DecorationRole:
+            return self.icon_layer if layer.enabled else self.icon_layer_disabled
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        if not index.isValid() or index.column() != 0 or role != QtCore.Qt.EditRole:
+            return False
+
+        self.layer_renamed.emit(index.internalPointer().layer, value)
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.ItemIsDropEnabled
+
+        result = QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsDragEnabled | QtCore.Qt.ItemIsDropEnabled
+        if index.column() == 0:
+            result |= QtCore.Qt.ItemIsEditable
+        return result
+
+    def supportedDropActions(self):
+        return QtCore.Qt.MoveAction
+
+    def mimeTypes(self):
+        return [self.mime_type]
+
+    def mimeData(self, indexes):
+        layer_ids = []
+        for index in indexes:
+            layer_id = self.node_of(index).id
+            if layer_id not in layer_ids:
+                layer_ids.append(layer_id)
+
+        result = QtCore.QMimeData()
+        result.setData(self.mime_type, QtCore.QByteArray(json.dumps(layer_ids).encode("utf-8")))
+        return result
+
+    def dropMimeData(self, data, action, row, column, parent):
+        if action != QtCore.Qt.MoveAction or not data.hasFormat(self.mime_type):
+            return False
+
+        new_parent = self.node_of(parent)
+        layer_ids = json.loads(bytes(data.data(self.mime_type)).decode("utf-8"))
+        nodes = [self.nodes[i] for i in layer_ids if i in self.nodes]
+        if any(node.is_ancestor_of(new_parent) for node in nodes):
+            # can't drop layer into itself
+            return False
+
+        # children of dragged layers are moved together with their parents
+        layer_ids = [n.id for n in nodes if not any(other is not n and other.is_ancestor_of(n) for other in nodes)]
+        self.layers_dropped.emit(layer_ids, new_parent.id, row)
+        # rows are not removed by the view: layers are moved by the drop handler, and `layerListChanged` (layer
+        # parent and index are part of the compared layer state) brings moved rows to the model via `set_layers`
+        return True
+
+    def set_layers(self, layers):
+        """
+        :type layers: list[api.Layer]
         """
-        after drag/drop tree reordering, just brute-force check
-        that rearranged items match layers parents
-        :return:
+        layers_by_id = dict((l.id, l) for l in layers)
+        wanted_children = {}
+        for layer in layers:
+            wanted_children.setdefault(layer.parent_id, []).append(layer)
+        for children in wanted_children.values():
+            children.reverse()
+
+        self.__remove_stale(self.root, layers_by_id)
+        self.__sync_children(self.root, wanted_children)
+
+    def __forget(self, node):
+        self.nodes.pop(node.id, None)
+        for child in node.children:
+            self.__forget(child)
+
+    def __remove_stale(self, node, layers_by_id):
         """
+        remove nodes of layers that were deleted or moved to another parent
+        """
+        for child in list(node.children):
+            layer = layers_by_id.get(child.id, None)
+            if layer is not None and layer.parent_id == node.id:
+                self.__remove_stale(child, layers_by_id)
+                continue
+
+            row = child.row()
+            self.beginRemoveRows(self.index_of(node), row, row)
+            del node.children[row]
+            self.__renumber(node, row, len(node.children))
+            self.__forget(child)
+            self.endRemoveRows()
+
+    @staticmethod
+    def __renumber(node, start, end):
+        """
+        update row numbers of node's children in range [start, end)
+        """
+        for row in range(start, end):
+            node.children[row].row_in_parent = row
 
-        def sync_item(tree_item, parent_layer_id):
-            for i in range(tree_item.childCount()):
-                child = tree_item.child(i)
-                rebuild_buttons(child)
+    def __update_node(self, node, layer):
+        node.layer = layer
+        if node.sync():
+            self.dataChanged.emit(self.index_of(node, 0), self.index_of(node, 1))
 
-                child_layer = item_to_layer(child)
+    def layer_changed(self, layer):
+        """
+        repaints the row of given layer, if it's name or visibility changed
+        """
+        node = self.nodes.get(layer.id, None)
+        if node is not None:
+            self.__update_node(node, layer)
+
+    def __sync_children(self, node, wanted_children):
+        parent_index = self.index_of(node)
+        for position, layer in enumerate(wanted_children.get(node.id, [])):
+            if position < len(node.children) and node.children[position].id == layer.id:
+                self.__update_node(node.children[position], layer)
+                continue
+
+            existing = self.nodes.get(layer.id, None)
+            if existing is not None:
+                # stale nodes are already removed, so existing node is a sibling further down the list
+                row = existing.row()
+                self.beginMoveRows(parent_index, row, row, parent_index, position)
+                del node.children[row]
+                node.children.insert(position, existing)
+                self.__renumber(node, position, row + 1)
+                self.endMoveRows()
+                self.__update_node(existing, layer)
+                continue
+
+            self.beginInsertRows(parent_index, position, position)
+            new_node = LayerNode(layer, node)
+            node.children.insert(position, new_node)
+            self.__renumber(node, position, len(node.children))
+            self.nodes[layer.id] = new_node
+            self.endInsertRows()
+
+        for child in node.children:
+            self.__sync_children(child, wanted_children)
+
+
+class VisibilityIconDelegate(QtWidgets.QStyledItemDelegate):
+    """
+    paints layer visibility icon; clicks are handled by `LayersTreeView`
+    """
+
+    def __init__(self, icon_visible, icon_hidden, icon_size, parent=None):
+        QtWidgets.QStyledItemDelegate.__init__(self, parent)
+        self.icon_visible = icon_visible
+        self.icon_hidden = icon_hidden
+        self.icon_size = icon_size
+
+    def paint(self, painter, option, index):
+        QtWidgets.QStyledItemDelegate.paint(self, painter, option, index)
+
+        icon = self.icon_visible if index.data(LayersModel.enabled_role) else self.icon_hidden
+        rect = QtCore.QRect(0, 0, self.icon_size, self.icon_size)
+        rect.moveCenter(option.rect.center())
+        icon.paint(painter, rect)
+
+
+class LayersTreeView(QtWidgets.QTreeView):
+    """
+    tree view that reports clicks on visibility column instead of changing selection
+    """
+
+    def __init__(self, parent=None):
+        QtWidgets.QTreeView.__init__(self, parent)
+        self.visibility_clicked = Signal("layer visibility clicked")
+
+    def mousePressEvent(self, event):
+        index = self.indexAt(event.pos())
+        if index.isValid() and index.column() == 1 and event.button() == QtCore.Qt.LeftButton:
+            self.visibility_clicked.emit(index.data(LayersModel.layer_role))
+            return
 
-                if child_layer.parent_id != parent_layer_id:
-                    log.info("changing layer parent: %r->%r (was %r)", parent_layer_id, child_layer, child_layer.parent_id)
-                    child_layer.parent = parent_layer_id
+        QtWidgets.QTreeView.mousePressEvent(self, event)
+
+
+def layers_in_order(wanted, current):
+    """
+    largest set of layers that are already in wanted relative order, so that only the rest need to be moved (longest
+    increasing subsequence of current positions).
+
+    :param list[int] wanted: layer IDs in wanted order
+    :param list[int] current: same layer IDs in current order
+    :rtype: set[int]
+    """
+    positions = dict((layer_id, i) for i, layer_id in enumerate(current))
+    tails = []  #: tails[n] - index in `wanted` of the smallest last element of increasing subsequence of length n+1
+    previous = [None] * len(wanted)
+    for i, layer_id in enumerate(wanted):
+        position = positions[layer_id]
+        low, high = 0, len(tails)
+        while low < high:
+            middle = (low + high) // 2
+            if positions[wanted[tails[middle]]] < position:
+                low = middle + 1
+            else:
+                high = middle
+        previous[i] = tails[low - 1] if low > 0 else None
+        if low == len(tails):
+            tails.append(i)
+        else:
+            tails[low] = i
 
-                new_index = tree_item.childCount() - i - 1
-                if child_layer.index != new_index:
-                    log.info("changing layer index: %r->%r (was %r)", child_layer, new_index, child_layer.index)
-                    child_layer.index = new_index
+    result = set()
+    i = tails[-1] if tails else None
+    while i is not None:
+        result.add(wanted[i])
+        i = previous[i]
+    return result
 
-                sync_item(child, child_layer.id)
 
-        with qt.signals_blocked(view):
-            sync_item(view.invisibleRootItem(), None)
+def build_view(parent, actions):
+    from ngSkinTools2.operations import layers
+
+    layer_icon_size = 20
+    visibility_icon_size = 13
+
+    icon_layer = qt.scaled_icon(":/layeredTexture.svg", layer_icon_size, layer_icon_size)
+    icon_layer_disabled = qt.scaled_icon(":/layerEditor.png", layer_icon_size, layer_icon_size)
+    icon_visible = qt.scaled_icon("eye-fill.svg", visibility_icon_size, visibility_icon_size)
+    icon_hidden = qt.scaled_icon("eye-slash-fill.svg", visibility_icon_size, visibility_icon_size)
 
-    # noinspection PyPep8Naming
-    class LayersWidget(QtWidgets.QTreeWidget):
-        def dropEvent(self, event):
-            QtWidgets.QTreeWidget.dropEvent(self, event)
-            sync_layer_parents_to_widget_items(self)
+    updating = qt.updateGuard()
 
-    view = LayersWidget(parent)
+    view = LayersTreeView(parent)
+    model = LayersModel(icon_layer, icon_layer_disabled, parent=view)
+    view.setModel(model)
+    view.setItemDelegateForColumn(
+        1, VisibilityIconDelegate(icon_visible, icon_hidden, visibility_icon_size * scale_multiplier, parent=view)
+    )
     view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
     view.setUniformRowHeights(True)
     view.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
@@ -83,7 +389,6 @@ def build_view(parent, actions):
     view.setContextMenuPolicy(QtCore.Qt.ActionsContextMenu)
     actions.addLayersActions(view)
 
-    view.setHeaderLabels(["Layers", ""])
     # view.setHeaderHidden(True)
     view.header().setMinimumSectionSize(1)
     view.header().setStretchLastSection(False)
@@ -94,85 +399,73 @@ def build_view(parent, actions):
     view.setIndentation(15 * scale_multiplier)
     view.setIconSize(QtCore.QSize(layer_icon_size * scale_multiplier, layer_icon_size * scale_multiplier))
 
-    tree_items = {}
-
-    def rebuild_buttons(item):
-        layer = item_to_layer(item)
-        bar = QtWidgets.QToolBar(parent=parent)
-        bar.setMovable(False)
-        bar.setIconSize(QtCore.QSize(visibility_icon_size * scale_multiplier, visibility_icon_size * scale_multiplier))
-        a = bar.addAction(icon_visible if layer is None or layer.enabled else icon_hidden, "Toggle enabled/disabled")
+    def index_to_layer(index):
+        # type: (QtCore.QModelIndex) -> Union[api.Layer, None]
+        if not index.isValid():
+            return None
+        return index.data(LayersModel.layer_role)
 
-        @qt.on(a.triggered)
-        def handler():
-            layer.enabled = not layer.enabled
-            session.events.layerListChanged.emitIfChanged()
+    @signal.on(view.visibility_clicked, qtParent=view)
+    def toggle_visibility(layer):
+        layer.enabled = not layer.enabled
+        model.layer_changed(layer)
+        session.events.layerListChanged.emitIfChanged()
 
-        view.setItemWidget(item, 1, bar)
+    @signal.on(model.layer_renamed, qtParent=view)
+    def rename_layer(layer, name):
+        log.info("item changed")
+        layers.renameLayer(layer, name)
 
-    def build_items(layer_infos):
+    @signal.on(model.layers_dropped, qtParent=view)
+    def move_layers(layer_ids, parent_id, row):
         """
-        sync items in view with provided layer values, trying to delete as little items on the view as possible
-        :type layer_infos: list[api.Layer]
+        after drag/drop, move layers to their new parent and position
         """
-
-        # build map "parent id->list of children "
-
-        log.info("syncing items...")
-
-        # save selected layers IDs to restore item selection later
-        selected_layer_ids = {item_to_layer(item).id for item in view.selectedItems()}
-        log.info("selected layer IDs: %r", selected_layer_ids)
-        current_item_id = None if view.currentItem() is None else item_to_layer(view.currentItem()).id
-
-        hierarchy = {}
-        for child in layer_infos:
-            if child.parent_id not in hierarchy:
-                hierarchy[child.parent_id] = []
-            hierarchy[child.parent_id].append(child)
-
-        def sync(parent_tree_item, children_list):
-            while parent_tree_item.childCount() > len(children_list):
-                parent_tree_item.removeChild(parent_tree_item.child(len(children_list)))
-
-            for index, child in enumerate(reversed(children_list)):
-                if index >= parent_tree_item.childCount():
-                    item = QtWidgets.QTreeWidgetItem()
-                    item.setSizeHint(1, QtCore.QSize(1 * scale_multiplier, 25 * scale_multiplier))
-                    item.setFlags(item.flags() | QtCore.Qt.ItemIsEditable)
-                    parent_tree_item.addChild(item)
-                else:
-                    item = parent_tree_item.child(index)
-
-                tree_items[child.id] = item
-
-                item.setData(0, layer_data_role, child)
-                item.setText(0, child.name)
-                item.setIcon(0, icon_layer if child.enabled else icon_layer_disabled)
-                rebuild_buttons(item)
-
-                sync(item, hierarchy.get(child.id, []))
-
-        with qt.signals_blocked(view):
-            tree_items.clear()
-            sync(view.invisibleRootItem(), hierarchy.get(None, []))
-
-            current_item = tree_items.get(current_item_id, None)
-            if current_item is not None:
-                view.setCurrentItem(current_item, 0, QtCore.QItemSelectionModel.NoUpdate)
-
-            for i in selected_layer_ids:
-                item = tree_items.get(i, None)
-                if item is not None:
-                    item.setSelected(True)
+        parent_node = model.root if parent_id is None else model.nodes[parent_id]
+        siblings = [n.layer for n in parent_node.children]
+        if row < 0:
+            row = len(siblings)
+
+        moved = [model.nodes[i].layer for i in layer_ids]
+        row -= len([l for l in siblings[:row] if l.id in layer_ids])
+        siblings = [l for l in siblings if l.id not in layer_ids]
+        siblings[row:row] = moved
+
+        # each edit is a separate plugin call; only layers that are not in place yet are edited, and all edits are
+        # a single undo step
+        with Undo(name="move layers"):
+            # current order of parent's children in the plugin, bottom to top; setting layer index moves the layer
+            # to that position, shifting others
+            current = [n.id for n in reversed(parent_node.children)]
+
+            for layer in moved:
+                if layer.parent_id != parent_id:
+                    log.info("changing layer parent: %r->%r (was %r)", parent_id, layer, layer.parent_id)
+                    layer.parent = parent_id
+                    layer.reload()
+                    current.insert(min(layer.index, len(current)), layer.id)
+
+            # siblings are displayed topmost first; going bottom to top, each layer that is out of order is placed
+            # right above the layer that should be below it
+            wanted = list(reversed(siblings))
+            in_place = layers_in_order([l.id for l in wanted], current)
+            for position, layer in enumerate(wanted):
+                if layer.id in in_place:
+                    continue
+                current.remove(layer.id)
+                new_index = 0 if position == 0 else current.index(wanted[position - 1].id) + 1
+                current.insert(new_index, layer.id)
+                log.info("changing layer index: %r->%r", layer, new_index)
+                layer.index = new_index
+
+        cmds.evalDeferred(session.events.layerListChanged.emitIfChanged)
 
     @signal.on(session.events.layerListChanged, qtParent=view)
+    @signal.idempotent
     def refresh_layer_list():
         log.info("event handler for layer list changed")
-        if not session.state.layersAvailable:
-            build_items([])
-        else:
-            build_items(session.state.all_layers)
+        with updating:
+            model.set_layers(session.state.all_layers if session.state.layersAvailable else [])
 
         update_selected_items()
 
@@ -180,42 +473,42 @@ def build_view(parent, actions):
     def current_layer_changed():
         log.info("event handler for currentLayerChanged")
         layer = session.state.currentLayer.layer
-        current_item = view.currentItem()
         if layer is None:
-            view.setCurrentItem(None)
+            view.setCurrentIndex(QtCore.QModelIndex())
             return
 
-        prev_layer = None if current_item is None else item_to_layer(current_item)
+        prev_layer = index_to_layer(view.currentIndex())
 
         if prev_layer is None or prev_layer.id != layer.id:
-            item = tree_items.get(layer.id, None)
-            if item is not None:
-                log.info("setting current item to " + item.text(0))
-                view.setCurrentItem(item, 0, QtCore.QItemSelectionModel.SelectCurrent | QtCore.QItemSelectionModel.ClearAndSelect)
-
-                item.setSelected(True)
-
-    @qt.on(view.currentItemChanged)
+            index = model.index_of_layer(layer.id)
+            if index.isValid():
+                log.info("setting current item to " + layer.name)
+                view.selectionModel().setCurrentIndex(
+                    index,
+                    QtCore.QItemSelectionModel.SelectCurrent | QtCore.QItemSelectionModel.ClearAndSelect | QtCore.QItemSelectionModel.Rows,
+                )
+
+    @qt.on(view.selectionModel().currentChanged)
     def current_item_changed(curr, _):
-        log.info("current item changed")
-        if curr is None:
+        if updating.updating:
             return
 
-        selected_layer = item_to_layer(curr)
+        log.info("current item changed")
+        selected_layer = index_to_layer(curr)
+        if selected_layer is None:
+            return
 
         if layers.getCurrentLayer() == selected_layer:
             return
 
         layers.setCurrentLayer(selected_layer)
 
-    @qt.on(view.itemChanged)
-    def item_changed(item, column):
-        log.info("item changed")
-        layers.renameLayer(item_to_layer(item), item.text(column))
+    @qt.on(view.selectionModel().selectionChanged)
+    def update_selected_items(*_):
+        if updating.updating:
+            return
 
-    @qt.on(view.itemSelectionChanged)
-    def update_selected_items():
-        selection = [item_to_layer(item) for item in view.selectedItems()]
+        selection = [index_to_layer(index) for index in view.selectionModel().selectedRows(0)]
 
         if selection != session.context.selected_layers(default=[]):
             log.info("new selected layers: %r", selection)
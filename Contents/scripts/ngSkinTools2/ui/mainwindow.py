@@ -10,21 +10,9 @@ from ngSkinTools2.api.session import session
 from ngSkinTools2.ui.options import config
 
 from .. import cleanup, signal, version
+from ..api.python_compatibility import Object
 from ..observableValue import ObservableValue
-from . import (
-    aboutwindow,
-    dialogs,
-    hotkeys_setup,
-    licensewindow,
-    qt,
-    tabLayerEffects,
-    tabMirror,
-    tabPaint,
-    tabSetWeights,
-    tabTools,
-    targetui,
-    updatewindow,
-)
+from . import dialogs, hotkeys_setup, qt, targetui
 from .layout import scale_multiplier
 
 log = getLogger("main window")
@@ -80,16 +68,27 @@ def build_menu(parent, actions):
     sub.addAction(actions.documentation.changelog)
     sub.addAction(actions.documentation.contact)
     sub.addSeparator()
-    sub.addAction("Register...").triggered.connect(lambda: licensewindow.show(parent))
+    def show_license_window():
+        from ngSkinTools2.ui import licensewindow
+
+        licensewindow.show(parent)
+
+    def show_about_window():
+        from ngSkinTools2.ui import aboutwindow
+
+        aboutwindow.show(parent)
+
+    sub.addAction("Register...").triggered.connect(show_license_window)
     sub.addSeparator()
     sub.addAction(actions.check_for_updates)
-    sub.addAction("About...").triggered.connect(lambda: aboutwindow.show(parent))
+    sub.addAction("About...").triggered.connect(show_about_window)
 
     # ILM
     sub = top_level_menu("ILM")
     sub.addSeparator().setText("Import data from JSON")
     sub.addAction(actions.ilm_importJointList)
     sub.addAction(actions.ilm_bindSkinAndImportLayer)
+    sub.addAction(actions.ilm_bindSkinAndImportLayerBatch)
 
     return menu
 
@@ -99,6 +98,53 @@ def build_rmb_menu_layers(view, actions):
     actions.addLayersActions(view)
 
 
+class LazyTabs(Object):
+    """
+    Tab contents are built when tab is shown for the first time. `@signal.suspendable` handlers, subscribed while
+    building a tab, are suspended while the tab is hidden; when tab is shown again, handlers that missed events run
+    once.
+    """
+
+    def __init__(self, tabs):
+        """
+        :type tabs: QtWidgets.QTabWidget
+        """
+        self.tabs = tabs
+        self.builders = []
+        self.scopes = []  # type: list[signal.SuspendableScope]
+
+        tabs.currentChanged.connect(lambda index: self.show_tab(index))
+
+    def add(self, label, builder):
+        """
+        :param builder: function that returns tab contents widget
+        """
+        placeholder = QtWidgets.QWidget()
+        layout = QtWidgets.QVBoxLayout(placeholder)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.builders.append(builder)
+        self.scopes.append(None)
+        self.tabs.addTab(placeholder, label)
+
+    def show_tab(self, index):
+        for i, scope in enumerate(self.scopes):
+            if scope is not None and i != index:
+                scope.suspend()
+
+        if index < 0:
+            return
+
+        scope = self.scopes[index]
+        if scope is not None:
+            scope.resume()
+            return
+
+        scope = self.scopes[index] = signal.SuspendableScope()
+        with scope:
+            self.tabs.widget(index).layout().addWidget(self.builders[index]())
+
+
 class MainWindowOptions:
     current_tab = ObservableValue(0)
 
@@ -118,13 +164,41 @@ def build_ui(parent):
 
     tabs = QtWidgets.QTabWidget(window)
 
-    tabs.addTab(tabPaint.build_ui(tabs, actions), "Paint")
-    tabs.addTab(tabSetWeights.build_ui(tabs), "Set Weights")
-    tabs.addTab(tabMirror.buildUI(tabs), "Mirror")
-    tabs.addTab(tabLayerEffects.build_ui(tabs), "Effects")
-    tabs.addTab(tabTools.build_ui(actions, session), "Tools")
+    def build_paint_tab():
+        from ngSkinTools2.ui import tabPaint
+
+        return tabPaint.build_ui(tabs, actions)
+
+    def build_set_weights_tab():
+        from ngSkinTools2.ui import tabSetWeights
+
+        return tabSetWeights.build_ui(tabs)
+
+    def build_mirror_tab():
+        from ngSkinTools2.ui import tabMirror
+
+        return tabMirror.buildUI(tabs)
 
-    @signal.on(options.current_tab.changed)
+    def build_effects_tab():
+        from ngSkinTools2.ui import tabLayerEffects
+
+        return tabLayerEffects.build_ui(tabs)
+
+    def build_tools_tab():
+        from ngSkinTools2.ui import tabTools
+
+        return tabTools.build_ui(actions, session)
+
+    lazy_tabs = LazyTabs(tabs)
+    with session.startup_profile.measure("critical", "main window tabs"):
+        # only the first tab is built at this point
+        lazy_tabs.add("Paint", build_paint_tab)
+        lazy_tabs.add("Set Weights", build_set_weights_tab)
+        lazy_tabs.add("Mirror", build_mirror_tab)
+        lazy_tabs.add("Effects", build_effects_tab)
+        lazy_tabs.add("Tools", build_tools_tab)
+
+    @signal.on(options.current_tab.changed, qtParent=tabs)
     def set_current_tab():
         tabs.setCurrentIndex(options.current_tab())
 
@@ -194,7 +268,12 @@ def build_ui(parent):
     dialogs.promptsParent = window
 
     if config.checkForUpdatesAtStartup():
-        updatewindow.silent_check_and_show_if_available(qt.mainWindow)
+        def check_for_updates():
+            from ngSkinTools2.ui import updatewindow
+
+            updatewindow.silent_check_and_show_if_available(qt.mainWindow)
+
+        session.defer_init("check for updates", check_for_updates)
 
     return window, options
 
@@ -1,9 +1,13 @@
+import time
 from threading import Thread
 
 from maya import utils
 
+from ngSkinTools2.api.log import getLogger
 from ngSkinTools2.api.python_compatibility import Object
 
+log = getLogger("parallel")
+
 
 class ParallelTask(Object):
     def __init__(self):
@@ -37,3 +41,74 @@ class ParallelTask(Object):
 
     def wait(self):
         self.current_thread.join()
+
+
+class StagedTask(Object):
+    """
+    Sequence of stages, where each stage runs either on main thread (anything that calls into Maya) or on a worker
+    thread (file I/O, compression). Progress is reported before each stage; cancellation takes effect between stages.
+
+    Stage handlers, as well as done handlers, receive the task as the only argument, and can use it to pass data
+    between stages.
+    """
+
+    def __init__(self):
+        self.stages = []
+        self.timings = []  #: list of (stage name, seconds)
+        self.cancelled = False
+        self.error = None
+        self.__progress_handlers = []
+        self.__done_handlers = []
+
+    def add_stage(self, name, handler, worker=False):
+        self.stages.append((name, handler, worker))
+
+    def add_progress_handler(self, handler):
+        """
+        :param handler: `handler(task, stage_index, stage_name)`
+        """
+        self.__progress_handlers.append(handler)
+
+    def add_done_handler(self, handler):
+        self.__done_handlers.append(handler)
+
+    def cancel(self):
+        self.cancelled = True
+
+    def is_finished(self):
+        return not self.cancelled and self.error is None and len(self.timings) == len(self.stages)
+
+    def format_timings(self):
+        return ", ".join("{0}: {1:.2f}s".format(name, duration) for name, duration in self.timings)
+
+    def start(self, async_exec=True):
+        self.__run_stage(0, async_exec)
+
+    def __run_stage(self, index, async_exec):
+        if self.cancelled or self.error is not None or index >= len(self.stages):
+            for i in self.__done_handlers:
+                i(self)
+            return
+
+        name, handler, worker = self.stages[index]
+        for i in self.__progress_handlers:
+            i(self, index, name)
+
+        def execute(*_):
+            started = time.time()
+            try:
+                handler(self)
+            except Exception as err:
+                log.error("stage '%s' failed: %s", name, err)
+                self.error = err
+            self.timings.append((name, time.time() - started))
+
+        if not worker:
+            execute()
+            self.__run_stage(index + 1, async_exec)
+            return
+
+        task = ParallelTask()
+        task.add_run_handler(execute)
+        task.add_done_handler(lambda _: self.__run_stage(index + 1, async_exec))
+        task.start(async_exec=async_exec)
@@ -48,13 +48,15 @@ def build_ui(parent):
             return 1.0
 
         @signal.on(session.context.selected_layers.changed, session.events.currentLayerChanged, qtParent=tab.tabContents)
+        @signal.suspendable
+        @signal.idempotent
         def update_values():
             layers = list_layers()
             enabled = len(layers) > 0
             opacity.set_enabled(enabled)
             opacity.set_value(default_selection_opacity(layers))
 
-        @signal.on(opacity.valueChanged)
+        @signal.on(opacity.valueChanged, qtParent=tab.tabContents)
         def opacity_edited():
             layers = list_layers()
             # avoid changing opacity of all selected layers if we just changed slider value based on changed layer selection
@@ -105,6 +107,8 @@ def build_ui(parent):
         configure_checkbox(dq, 'mirror_dq')
 
         @signal.on(session.context.selected_layers.changed, session.events.currentLayerChanged, qtParent=tab.tabContents)
+        @signal.suspendable
+        @signal.idempotent
         def update_values():
             layers = list_layers()
             with qt.signals_blocked(influences):
@@ -145,7 +149,8 @@ def build_ui(parent):
 
         update_guard = qt.updateGuard()
 
-        @signal.on(session.events.targetChanged)
+        @signal.on(session.events.targetChanged, qtParent=tab.tabContents)
+        @signal.suspendable
         def update_ui():
             group.setEnabled(session.state.layersAvailable)
 
@@ -164,7 +169,7 @@ def build_ui(parent):
             prune_weight.set_enabled(use_prune_weight.isChecked())
 
         @qt.on(use_max_influences.stateChanged, use_prune_weight.stateChanged)
-        @signal.on(max_influences.valueChanged, prune_weight.valueChanged)
+        @signal.on(max_influences.valueChanged, prune_weight.valueChanged, qtParent=tab.tabContents)
         def update_values():
             if update_guard.updating:
                 return
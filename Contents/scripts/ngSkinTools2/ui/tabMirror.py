@@ -40,7 +40,8 @@ def buildUI(parent_window):
             def value_changed():
                 session.state.mirror().axis = mirror_axis.currentData()
 
-            @signal.on(session.events.targetChanged)
+            @signal.on(session.events.targetChanged, qtParent=tab.tabContents)
+            @signal.suspendable
             def target_changed():
                 if session.state.layersAvailable:
                     qt.select_data(mirror_axis, session.state.mirror().axis)
@@ -52,11 +53,12 @@ def buildUI(parent_window):
         def mirror_seam_width():
             seam_width_ctrl = NumberSliderGroup(max_value=100)
 
-            @signal.on(seam_width_ctrl.valueChanged)
+            @signal.on(seam_width_ctrl.valueChanged, qtParent=tab.tabContents)
             def value_changed():
                 session.state.mirror().seam_width = seam_width_ctrl.value()
 
-            @signal.on(session.events.targetChanged)
+            @signal.on(session.events.targetChanged, qtParent=tab.tabContents)
+            @signal.suspendable
             def update_values():
                 if session.state.layersAvailable:
                     seam_width_ctrl.set_value(session.state.mirror().seam_width)
@@ -99,6 +101,7 @@ def buildUI(parent_window):
             layout.addWidget(set_button)
 
             @signal.on(session.events.targetChanged, qtParent=tab.tabContents)
+            @signal.suspendable
             def update_ui():
                 if not session.state.layersAvailable:
                     return
@@ -158,7 +161,8 @@ def buildUI(parent_window):
         def value_changed():
             session.state.mirror().vertex_transfer_mode = vertex_mapping_mode.currentData()
 
-        @signal.on(session.events.targetChanged)
+        @signal.on(session.events.targetChanged, qtParent=tab.tabContents)
+        @signal.suspendable
         def target_changed():
             if session.state.layersAvailable:
                 qt.select_data(vertex_mapping_mode, session.state.mirror().vertex_transfer_mode)
@@ -45,7 +45,7 @@ def build_ui(actions, session):
         def update_new_layer():
             options.create_new_layer.set(new_layer.isChecked())
 
-        @signal.on(options.create_new_layer.changed)
+        @signal.on(options.create_new_layer.changed, qtParent=tab.tabContents)
         def update_ui():
             new_layer.setChecked(options.create_new_layer())
 
@@ -199,7 +199,7 @@ def build_transfer_action(session, parent):
 
     result = define_action(parent, "Transfer layers...", callback=handler)
 
-    @signal.on(session.events.nodeSelectionChanged)
+    @signal.on(session.events.nodeSelectionChanged, qtParent=parent)
     def on_selection_changed():
         result.setEnabled(detect_targets())
 